@@ -0,0 +1,98 @@
+"""
+Shared bulk-update helper for the external-link importer scripts.
+
+add_feis_links and add_fna_links follow the same pattern: probe which
+candidate species exist and already carry a link from the source, then
+append the missing links. This module runs that pattern with one
+prepared statement batched over all species inside a single
+transaction.
+"""
+
+import json
+import sqlite3
+from pathlib import Path
+
+try:
+    import orjson
+
+    def _dumps(obj):
+        return orjson.dumps(obj).decode()
+except ImportError:
+    _dumps = json.dumps
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+DB_PATH = PROJECT_ROOT / "cli" / "oak_compendium.db"
+
+
+def bulk_add_external_link(
+    source_key, source_name, species_urls, dry_run=False, report_missing=True
+):
+    """Add one external link per species in a single batched transaction.
+
+    species_urls maps candidate scientific names to their URLs. Returns
+    (added, skipped, not_found) where not_found is the set of candidate
+    names with no matching oak_entries row. When report_missing is
+    False, missing candidates are returned silently so the caller can
+    reconcile name variants itself.
+    """
+    conn = sqlite3.connect(DB_PATH)
+    if not dry_run:
+        # Cut per-commit fsync cost for the batched write
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+    cursor = conn.cursor()
+
+    # Only fetch the rows we might touch; the existence check runs in
+    # SQL so the stored JSON is never decoded in Python
+    candidates = list(species_urls)
+    placeholders = ",".join("?" * len(candidates))
+    cursor.execute(
+        f"SELECT scientific_name,"
+        f" EXISTS (SELECT 1 FROM json_each(COALESCE(external_links, '[]'))"
+        f" WHERE json_extract(value, '$.source') = ?)"
+        f" FROM oak_entries WHERE scientific_name IN ({placeholders})",
+        [source_key] + candidates,
+    )
+    db_has_link = {name: bool(has) for name, has in cursor.fetchall()}
+    db_count = cursor.execute("SELECT COUNT(*) FROM oak_entries").fetchone()[0]
+
+    print(f"Database has {db_count} species")
+    print(f"{source_key} covers {len(species_urls)} candidate names\n")
+
+    added = 0
+    skipped = 0
+    not_found = set()
+    pending = []
+
+    for species, url in species_urls.items():
+        if species not in db_has_link:
+            if report_missing:
+                print(f"  {species}: NOT IN DATABASE")
+            not_found.add(species)
+            continue
+
+        print(f"  {species}: ", end="")
+        if db_has_link[species]:
+            print(f"  Already has {source_key} link")
+            skipped += 1
+        else:
+            print(f"ADDED - {url}")
+            link = {"source": source_key, "name": source_name, "url": url}
+            pending.append((_dumps(link), species, source_key))
+            added += 1
+
+    if pending and not dry_run:
+        # Append in SQL so the full array is never re-serialized in
+        # Python; the NOT EXISTS guard keeps repeat runs idempotent
+        cursor.executemany(
+            "UPDATE oak_entries"
+            " SET external_links = json_insert(COALESCE(external_links, '[]'), '$[#]', json(?))"
+            " WHERE scientific_name = ?"
+            " AND NOT EXISTS (SELECT 1 FROM json_each(COALESCE(oak_entries.external_links, '[]'))"
+            " WHERE json_extract(value, '$.source') = ?)",
+            pending,
+        )
+        conn.commit()
+
+    conn.close()
+    return added, skipped, not_found
@@ -11,12 +11,8 @@ Usage:
 """
 
 import argparse
-import json
-import sqlite3
-from pathlib import Path
 
-PROJECT_ROOT = Path(__file__).parent.parent.parent
-DB_PATH = PROJECT_ROOT / "cli" / "oak_compendium.db"
+from _bulk import bulk_add_external_link
 
 # FEIS URL pattern - uses first 3 letters of species name
 FEIS_URL_PATTERN = "https://www.fs.usda.gov/database/feis/plants/tree/que{code}/all.html"
@@ -59,60 +55,16 @@ FEIS_SPECIES = {
     "wislizeni": "wis",
 }
 
+# Full URLs precomputed once so the main loop is a plain dict lookup
+FEIS_URLS = {
+    name: FEIS_URL_PATTERN.format(code=code)
+    for name, code in sorted(FEIS_SPECIES.items())
+}
+
 
 def get_feis_url(species_name):
     """Generate FEIS URL for a species."""
-    code = FEIS_SPECIES.get(species_name)
-    if not code:
-        return None
-    return FEIS_URL_PATTERN.format(code=code)
-
-
-def update_external_links(scientific_name, new_link, dry_run=False):
-    """Add a link to the external_links JSON array."""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-
-    # Get current external_links
-    cursor.execute(
-        "SELECT external_links FROM oak_entries WHERE scientific_name = ?",
-        (scientific_name,),
-    )
-    row = cursor.fetchone()
-
-    if not row:
-        print(f"  WARNING: Species '{scientific_name}' not found in database")
-        conn.close()
-        return False
-
-    current_links = row[0]
-    if current_links:
-        try:
-            links = json.loads(current_links)
-        except json.JSONDecodeError:
-            links = []
-    else:
-        links = []
-
-    # Check if FEIS link already exists
-    for link in links:
-        if link.get("source") == "FEIS":
-            print(f"  Already has FEIS link")
-            conn.close()
-            return False
-
-    # Add new link
-    links.append(new_link)
-
-    if not dry_run:
-        cursor.execute(
-            "UPDATE oak_entries SET external_links = ? WHERE scientific_name = ?",
-            (json.dumps(links), scientific_name),
-        )
-        conn.commit()
-
-    conn.close()
-    return True
+    return FEIS_URLS.get(species_name)
 
 
 def main():
@@ -129,46 +81,19 @@ def main():
     if args.dry_run:
         print("DRY RUN MODE - No database changes will be made\n")
 
-    # Get all species from database
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("SELECT scientific_name FROM oak_entries")
-    db_species = {row[0] for row in cursor.fetchall()}
-    conn.close()
-
-    print(f"Database has {len(db_species)} species")
-    print(f"FEIS covers {len(FEIS_SPECIES)} species\n")
-
-    added = 0
-    skipped = 0
-    not_found = 0
-
-    for species, code in sorted(FEIS_SPECIES.items()):
-        if species not in db_species:
-            print(f"  {species}: NOT IN DATABASE")
-            not_found += 1
-            continue
-
-        url = get_feis_url(species)
-        link = {
-            "source": "FEIS",
-            "name": "Fire Effects Information System",
-            "url": url,
-        }
-
-        print(f"  {species}: ", end="")
-        if update_external_links(species, link, args.dry_run):
-            print(f"ADDED - {url}")
-            added += 1
-        else:
-            skipped += 1
+    added, skipped, not_found = bulk_add_external_link(
+        "FEIS",
+        "Fire Effects Information System",
+        FEIS_URLS,
+        dry_run=args.dry_run,
+    )
 
     print(f"\n{'=' * 60}")
     print("SUMMARY")
     print(f"{'=' * 60}")
     print(f"Added: {added}")
     print(f"Skipped (already had FEIS): {skipped}")
-    print(f"Not in database: {not_found}")
+    print(f"Not in database: {len(not_found)}")
 
 
 if __name__ == "__main__":
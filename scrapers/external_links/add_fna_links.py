@@ -11,12 +11,8 @@ Usage:
 """
 
 import argparse
-import json
-import sqlite3
-from pathlib import Path
 
-PROJECT_ROOT = Path(__file__).parent.parent.parent
-DB_PATH = PROJECT_ROOT / "cli" / "oak_compendium.db"
+from _bulk import bulk_add_external_link
 
 # FNA URL pattern - species name with underscores
 FNA_URL_PATTERN = "https://floranorthamerica.org/Quercus_{name}"
@@ -121,61 +117,19 @@ FNA_SPECIES = [
     "wislizeni",
 ]
 
+# Full URLs precomputed once so the main loop is a plain dict lookup.
+# FNA sometimes uses a different spelling, and underscores in URLs.
+FNA_URLS = {
+    name: FNA_URL_PATTERN.format(
+        name=FNA_NAME_MAPPING.get(name, name).replace(" ", "_")
+    )
+    for name in FNA_SPECIES
+}
+
 
 def get_fna_url(species_name):
     """Generate FNA URL for a species."""
-    # Check if FNA uses a different name
-    url_name = FNA_NAME_MAPPING.get(species_name, species_name)
-    # FNA uses underscores in URLs
-    url_name = url_name.replace(" ", "_")
-    return FNA_URL_PATTERN.format(name=url_name)
-
-
-def update_external_links(scientific_name, new_link, dry_run=False):
-    """Add a link to the external_links JSON array."""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-
-    # Get current external_links
-    cursor.execute(
-        "SELECT external_links FROM oak_entries WHERE scientific_name = ?",
-        (scientific_name,),
-    )
-    row = cursor.fetchone()
-
-    if not row:
-        print(f"  WARNING: Species '{scientific_name}' not found in database")
-        conn.close()
-        return False
-
-    current_links = row[0]
-    if current_links:
-        try:
-            links = json.loads(current_links)
-        except json.JSONDecodeError:
-            links = []
-    else:
-        links = []
-
-    # Check if FNA link already exists
-    for link in links:
-        if link.get("source") == "FNA":
-            print(f"  Already has FNA link")
-            conn.close()
-            return False
-
-    # Add new link
-    links.append(new_link)
-
-    if not dry_run:
-        cursor.execute(
-            "UPDATE oak_entries SET external_links = ? WHERE scientific_name = ?",
-            (json.dumps(links), scientific_name),
-        )
-        conn.commit()
-
-    conn.close()
-    return True
+    return FNA_URLS.get(species_name)
 
 
 def main():
@@ -192,52 +146,34 @@ def main():
     if args.dry_run:
         print("DRY RUN MODE - No database changes will be made\n")
 
-    # Get all species from database
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("SELECT scientific_name FROM oak_entries")
-    db_species = {row[0] for row in cursor.fetchall()}
-    conn.close()
-
-    print(f"Database has {len(db_species)} species")
-    print(f"FNA covers {len(FNA_SPECIES)} species\n")
-
-    added = 0
-    skipped = 0
-    not_found = 0
-
-    for species in FNA_SPECIES:
-        # Try to match with database (handle naming differences)
-        if species in db_species:
-            db_name = species
-        elif species.replace("-", " ") in db_species:
-            # Handle hyphenated names like "cornelius-mulleri" -> "cornelius mulleri"
-            db_name = species.replace("-", " ")
-        else:
-            print(f"  {species}: NOT IN DATABASE")
-            not_found += 1
-            continue
-
-        url = get_fna_url(species)
-        link = {
-            "source": "FNA",
-            "name": "Flora of North America",
-            "url": url,
-        }
-
-        print(f"  {db_name}: ", end="")
-        if update_external_links(db_name, link, args.dry_run):
-            print(f"ADDED - {url}")
-            added += 1
-        else:
-            skipped += 1
+    # Candidates include hyphen-normalized variants: hyphenated names
+    # like "cornelius-mulleri" may be stored as "cornelius mulleri"
+    species_urls = dict(FNA_URLS)
+    species_urls.update(
+        {name.replace("-", " "): url for name, url in FNA_URLS.items() if "-" in name}
+    )
+
+    added, skipped, not_found = bulk_add_external_link(
+        "FNA",
+        "Flora of North America",
+        species_urls,
+        dry_run=args.dry_run,
+        report_missing=False,
+    )
+
+    # A species is only missing if none of its name variants matched
+    missing = {
+        s for s in FNA_SPECIES if s in not_found and s.replace("-", " ") in not_found
+    }
+    for species in sorted(missing):
+        print(f"  {species}: NOT IN DATABASE")
 
     print(f"\n{'=' * 60}")
     print("SUMMARY")
     print(f"{'=' * 60}")
     print(f"Added: {added}")
     print(f"Skipped (already had FNA): {skipped}")
-    print(f"Not in database: {not_found}")
+    print(f"Not in database: {len(missing)}")
 
 
 if __name__ == "__main__":
@@ -8,20 +8,92 @@ import sys
 import json
 import argparse
 import re
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import urlencode, quote
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from lxml import etree
+import lxml.html
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Shared session: keep-alive avoids a fresh TCP+TLS handshake per request
+SESSION = requests.Session()
+SESSION.mount(
+    'https://',
+    HTTPAdapter(
+        pool_connections=10,
+        pool_maxsize=10,
+        max_retries=Retry(total=3, backoff_factor=0.3),
+    ),
+)
+SESSION.headers.update({
+    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+})
+
+# Compiled once at import; these run for every taxon result
+RE_COMMON_NAME = re.compile(r'\(([^)]+)\)')
+RE_STRIP_COMMON = re.compile(r'\s*\([^)]+\)')
+RE_HYBRID_NAME = re.compile(r'Quercus\s*[×x]\s*(\w+)', re.IGNORECASE)
+RE_QUERCUS_PREFIX = re.compile(r'Quercus\s*', re.IGNORECASE)
+RE_LEADING_X = re.compile(r'^[×x]\s*')
+RE_PARENT_FORMULA = re.compile(r'Quercus\s+(\w+)\s*[×x]\s*(\w+)', re.IGNORECASE)
+# One pass: normalizes spacing around × (or a bare "x"), and joins word
+# fragments split by <mark> tags, e.g. "× sub falcata" -> "× subfalcata"
+RE_NAME_CLEANUP = re.compile(r'\s*(?:×|\b[xX]\b)\s*(?:([a-z]+)\s+([a-z]+))?')
+RE_LEADING_PAREN = re.compile(r'^\s*\(?\s*')
+RE_TRAILING_PAREN = re.compile(r'\s*\)?\s*$')
+RE_OTHER_NAMES = re.compile(r'^.*?Other Names:\s*', re.IGNORECASE)
+
+# XPath compiled once; each runs as a single C-level walk per result
+XP_RESULTS = etree.XPath("//div[contains(@class, 'taxon-result')]")
+XP_TAXON_SPAN = etree.XPath(
+    ".//h4[contains(@class, 'media-heading')]//span[contains(@class, 'taxon')]")
+XP_LINKS = etree.XPath(".//a")
+XP_SCINAME = etree.XPath(".//span[contains(@class, 'sciname')]")
+XP_COMNAME = etree.XPath(
+    ".//span[contains(@class, 'othernames')]//span[contains(@class, 'comname')]")
+XP_MUTED = etree.XPath(".//p[contains(@class, 'text-muted')]")
+
+# Rate limiting - shared across worker threads so the aggregate request
+# rate to iNaturalist stays the same no matter how many searches run
+# concurrently
+RATE_LIMIT_DELAY = 0.5  # seconds between requests
+_rate_lock = threading.Lock()
+_last_request_ts = 0.0
+
+
+def rate_limit_wait():
+    """Block until RATE_LIMIT_DELAY has elapsed since the last request."""
+    global _last_request_ts
+    with _rate_lock:
+        remaining = RATE_LIMIT_DELAY - (time.monotonic() - _last_request_ts)
+        if remaining > 0:
+            time.sleep(remaining)
+        _last_request_ts = time.monotonic()
+
+# Set from --verbose; per-result diagnostics are suppressed by default
+VERBOSE = False
+
+
+def debug(msg):
+    """Print per-result scraping diagnostics when --verbose is set"""
+    if VERBOSE:
+        print(msg)
 
 
 def fetch_page(url, headers=None):
     """Fetch a web page and return its content"""
-    if headers is None:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-
+    rate_limit_wait()
     try:
-        response = requests.get(url, headers=headers, timeout=30)
+        response = SESSION.get(url, headers=headers, timeout=30)
         response.raise_for_status()
         return response.text
     except requests.RequestException as e:
@@ -29,6 +101,20 @@ def fetch_page(url, headers=None):
         return None
 
 
+def _clean_name_match(m):
+    """Replacement for RE_NAME_CLEANUP: restores ' × ' and rejoins fragments"""
+    if m.group(1):
+        return f' × {m.group(1)}{m.group(2)}'
+    return ' × '
+
+
+def element_text(el):
+    """Join an element's text nodes with single spaces, like
+    BeautifulSoup's get_text(separator=' ', strip=True) -- <mark> tags
+    split words and the pieces need a space between them"""
+    return ' '.join(' '.join(el.itertext()).split())
+
+
 def parse_hybrid_name(name_text):
     """
     Parse hybrid name from iNaturalist result
@@ -40,37 +126,41 @@ def parse_hybrid_name(name_text):
 
     # Extract common name if present (in parentheses)
     common_name = None
-    common_match = re.search(r'\(([^)]+)\)', name_text)
+    common_match = RE_COMMON_NAME.search(name_text)
     if common_match:
         common_name = common_match.group(1).strip()
         # Remove the common name part from the text
-        name_text = re.sub(r'\s*\([^)]+\)', '', name_text)
+        name_text = RE_STRIP_COMMON.sub('', name_text)
 
     # Match patterns like "Quercus × subfalcata" or "Quercus x subfalcata"
-    match = re.search(r'Quercus\s*[×x]\s*(\w+)', name_text, re.IGNORECASE)
+    match = RE_HYBRID_NAME.search(name_text)
     if match:
         return match.group(1), common_name
 
     # Fallback: just remove Quercus and any × or x
-    name_text = re.sub(r'Quercus\s*', '', name_text, flags=re.IGNORECASE)
-    name_text = re.sub(r'^[×x]\s*', '', name_text)
+    name_text = RE_QUERCUS_PREFIX.sub('', name_text)
+    name_text = RE_LEADING_X.sub('', name_text)
     return name_text.strip(), common_name
 
 
-def extract_parent_formula(other_names_text):
+ParentInfo = namedtuple('ParentInfo', ['formula', 'parent1', 'parent2'])
+
+
+def extract_parents(other_names_text):
     """
-    Extract parent formula from "Other Names" section
-    E.g., "Quercus falcata × phellos" or "Quercus falcata x phellos"
+    Extract parent formula and both parent names from "Other Names" section
+    E.g., "Quercus falcata × phellos" -> ParentInfo with formula and
+    parent1/parent2 already split, so downstream code never re-parses
     """
     if not other_names_text:
         return None
 
     # Look for patterns like "Quercus species1 × species2"
-    match = re.search(r'Quercus\s+(\w+)\s*[×x]\s*(\w+)', other_names_text, re.IGNORECASE)
+    match = RE_PARENT_FORMULA.search(other_names_text)
     if match:
-        parent1 = match.group(1).lower()
-        parent2 = match.group(2).lower()
-        return f"Quercus {parent1} × Quercus {parent2}"
+        parent1 = f"Quercus {match.group(1).lower()}"
+        parent2 = f"Quercus {match.group(2).lower()}"
+        return ParentInfo(f"{parent1} × {parent2}", parent1, parent2)
 
     return None
 
@@ -91,70 +181,59 @@ def search_hybrids(parent_name):
         print("Failed to fetch search results")
         return []
 
-    soup = BeautifulSoup(html, 'html.parser')
+    # Only the taxon-result subtrees matter; everything else on the
+    # page (nav, sidebars, inline JSON) is never visited again
+    doc = lxml.html.fromstring(html)
     hybrids = []
 
     # Find all taxon results - everything in div.media.taxon-result is a hybrid
-    results = soup.find_all('div', class_='taxon-result')
+    results = XP_RESULTS(doc)
 
     print(f"Found {len(results)} taxon results")
 
     for idx, result in enumerate(results, 1):
         try:
-            print(f"\nProcessing result #{idx}...")
+            debug(f"\nProcessing result #{idx}...")
 
-            # Get the media-body
-            media_body = result.find('div', class_='media-body')
-            if not media_body:
-                print("  ERROR: no media-body found")
-                continue
-
-            # Get the heading with the link
-            heading = media_body.find('h4', class_='media-heading')
-            if not heading:
-                print("  ERROR: no media-heading found")
-                continue
-
-            # Find the span.taxon wrapper which contains the scientific name
-            taxon_span = heading.find('span', class_='taxon')
-            if not taxon_span:
-                print("  ERROR: no taxon span found")
+            # One walk straight to the taxon span in the heading
+            taxon_spans = XP_TAXON_SPAN(result)
+            if not taxon_spans:
+                debug("  ERROR: no taxon span found")
                 continue
+            taxon_span = taxon_spans[0]
 
             # Find the <a> tag within the taxon span that contains the sciname
             # There might be multiple links, we need the one with span.sciname
-            links = taxon_span.find_all('a')
+            links = XP_LINKS(taxon_span)
             link_element = None
             sciname_span = None
 
-            print(f"  Found {len(links)} links in taxon span")
+            debug(f"  Found {len(links)} links in taxon span")
             for idx_link, link in enumerate(links):
-                print(f"    Link {idx_link+1}: {link.get('href', 'NO HREF')}")
-                print(f"    Link HTML: {str(link)[:150]}")
-                sciname = link.find('span', class_='sciname')
-                print(f"    Has sciname span: {sciname is not None}")
+                debug(f"    Link {idx_link+1}: {link.get('href', 'NO HREF')}")
+                sciname = XP_SCINAME(link)
+                debug(f"    Has sciname span: {bool(sciname)}")
                 if sciname:
                     link_element = link
-                    sciname_span = sciname
+                    sciname_span = sciname[0]
                     break
 
-            if not link_element or not sciname_span:
-                print(f"  ERROR: no link with sciname found")
+            if link_element is None or sciname_span is None:
+                debug(f"  ERROR: no link with sciname found")
                 # Try a different approach - maybe sciname is adjacent to the link
-                sciname_span = taxon_span.find('span', class_='sciname')
-                if sciname_span:
-                    print(f"  Found sciname span elsewhere in taxon: {str(sciname_span)[:100]}")
+                scinames = XP_SCINAME(taxon_span)
+                if scinames:
+                    sciname_span = scinames[0]
+                    debug(f"  Found sciname span elsewhere in taxon")
                     # Get any link in the taxon span
-                    link_element = taxon_span.find('a')
-                    if link_element:
-                        print(f"  Using first link found: {link_element.get('href')}")
+                    if links:
+                        link_element = links[0]
+                        debug(f"  Using first link found: {link_element.get('href')}")
                     else:
                         continue
                 else:
                     continue
 
-            print(f"{link_element}")
-
             # Get the URL (prepend base URL)
             taxon_url = link_element.get('href', '')
             if taxon_url:
@@ -162,65 +241,58 @@ def search_hybrids(parent_name):
 
             # Get the scientific name with spaces between <mark> tags preserved
             # Use separator=' ' to add space between elements
-            name_text = sciname_span.get_text(separator=' ', strip=True)
+            name_text = element_text(sciname_span)
 
-            print(f"  Name: {name_text}")
-            print(f"  URL: {taxon_url}")
+            debug(f"  Name: {name_text}")
+            debug(f"  URL: {taxon_url}")
 
-            # Keep the full Latin name (e.g., "Quercus × subfalcata")
-            # Clean up whitespace and ensure proper spacing around ×
+            # Keep the full Latin name (e.g., "Quercus × subfalcata"):
+            # normalize whitespace, fix × spacing, and repair word
+            # fragments split by <mark> tags in a single regex pass
             full_latin_name = ' '.join(name_text.split())
-            # Ensure space around × or x
-            full_latin_name = re.sub(r'\s*×\s*', ' × ', full_latin_name)
-            full_latin_name = re.sub(r'\s+x\s+', ' × ', full_latin_name, flags=re.IGNORECASE)
-
-            # Fix word fragments that were split by <mark> tags
-            # e.g., "sub falcata" -> "subfalcata"
-            # Pattern: lowercase letters, space, lowercase letters (after the × symbol)
-            full_latin_name = re.sub(r'(×\s+)([a-z]+)\s+([a-z]+)', r'\1\2\3', full_latin_name)
+            full_latin_name = RE_NAME_CLEANUP.sub(_clean_name_match, full_latin_name)
 
-            print(f"  Cleaned name: {full_latin_name}")
+            debug(f"  Cleaned name: {full_latin_name}")
 
             # Get common name from span.othernames > span.comname
             # This is inside the taxon_span, not the general heading
             common_name = None
-            othernames_span = taxon_span.find('span', class_='othernames')
-            print(f"  Found othernames span: {othernames_span is not None}")
-            if othernames_span:
-                comname_span = othernames_span.find('span', class_='comname')
-                print(f"  Found comname span: {comname_span is not None}")
-                if comname_span:
-                    common_name = comname_span.get_text(separator=' ', strip=True)
-                    print(f"  Raw common name: '{common_name}'")
-                    # Remove parentheses
-                    common_name = re.sub(r'^\s*\(?\s*', '', common_name)
-                    common_name = re.sub(r'\s*\)?\s*$', '', common_name)
-
-            print(f"  Extracted common name: {common_name}")
+            comname_spans = XP_COMNAME(taxon_span)
+            debug(f"  Found comname span: {bool(comname_spans)}")
+            if comname_spans:
+                common_name = element_text(comname_spans[0])
+                debug(f"  Raw common name: '{common_name}'")
+                # Remove parentheses
+                common_name = RE_LEADING_PAREN.sub('', common_name)
+                common_name = RE_TRAILING_PAREN.sub('', common_name)
+
+            debug(f"  Extracted common name: {common_name}")
 
             # Get parent formula from "Other Names:" section
             other_names = None
-            parent_formula = None
+            parents = None
 
             # Find all p.text-muted and look for "Other Names:"
-            muted_paragraphs = media_body.find_all('p', class_='text-muted')
-            print(f"  Found {len(muted_paragraphs)} muted paragraphs")
+            muted_paragraphs = XP_MUTED(result)
+            debug(f"  Found {len(muted_paragraphs)} muted paragraphs")
             for p in muted_paragraphs:
-                # Use separator=' ' to preserve spaces between <mark> tags
-                p_text = p.get_text(separator=' ', strip=True)
-                print(f"    Paragraph text: {p_text[:100]}...")
+                # Spaces between <mark> tag fragments are preserved
+                p_text = element_text(p)
+                debug(f"    Paragraph text: {p_text[:100]}...")
                 if 'Other Names:' in p_text or 'Other names:' in p_text:
                     # Extract just the parent formula part (after "Other Names:")
-                    other_names = re.sub(r'^.*?Other Names:\s*', '', p_text, flags=re.IGNORECASE)
-                    print(f"    Extracted other names: {other_names}")
-                    parent_formula = extract_parent_formula(other_names)
-                    print(f"    Parent formula from extraction: {parent_formula}")
+                    other_names = RE_OTHER_NAMES.sub('', p_text)
+                    debug(f"    Extracted other names: {other_names}")
+                    parents = extract_parents(other_names)
+                    debug(f"    Parents from extraction: {parents}")
                     break
 
             hybrid_data = {
                 'name': full_latin_name,
                 'common_name': common_name,
-                'parent_formula': parent_formula,
+                'parent_formula': parents.formula if parents else None,
+                'parent1': parents.parent1 if parents else None,
+                'parent2': parents.parent2 if parents else None,
                 'other_names': other_names,
                 'url': taxon_url
             }
@@ -228,11 +300,11 @@ def search_hybrids(parent_name):
             hybrids.append(hybrid_data)
             print(f"  ✓ ADDED hybrid: {full_latin_name}")
             if common_name:
-                print(f"    Common name: {common_name}")
-            if parent_formula:
-                print(f"    Parent formula: {parent_formula}")
+                debug(f"    Common name: {common_name}")
+            if parents:
+                debug(f"    Parent formula: {parents.formula}")
             else:
-                print(f"    Parent formula: Not found")
+                debug(f"    Parent formula: Not found")
 
         except Exception as e:
             print(f"  ERROR parsing result: {e}")
@@ -250,23 +322,12 @@ def convert_to_quercus_format(hybrids, parent_name):
     species_list = []
 
     for hybrid in hybrids:
-        # Parse parent names from formula if available
-        parent1 = None
-        parent2 = None
-
-        print(f"\nConverting hybrid: {hybrid['name']}")
-        print(f"  Parent formula: {hybrid.get('parent_formula')}")
-
-        if hybrid.get('parent_formula'):
-            formula = hybrid['parent_formula']
-            # Try to match "Quercus species1 × Quercus species2" or "Quercus species1 × species2"
-            match = re.search(r'Quercus\s+(\w+)\s*[×xX]\s*(?:Quercus\s+)?(\w+)', formula, re.IGNORECASE)
-            if match:
-                parent1 = f"Quercus {match.group(1)}"
-                parent2 = f"Quercus {match.group(2)}"
-                print(f"  ✓ Extracted parents: {parent1}, {parent2}")
-            else:
-                print(f"  ✗ Could not extract parents from: {formula}")
+        # Parents were already split during extraction
+        parent1 = hybrid.get('parent1')
+        parent2 = hybrid.get('parent2')
+
+        debug(f"\nConverting hybrid: {hybrid['name']}")
+        debug(f"  Parent formula: {hybrid.get('parent_formula')}")
 
         # Add common name to local_names if present
         local_names = []
@@ -298,8 +359,8 @@ def convert_to_quercus_format(hybrids, parent_name):
             "url": hybrid.get('url', '')
         }
 
-        print(f"  Final entry parent1: {species_entry['parent1']}")
-        print(f"  Final entry parent2: {species_entry['parent2']}")
+        debug(f"  Final entry parent1: {species_entry['parent1']}")
+        debug(f"  Final entry parent2: {species_entry['parent2']}")
 
         species_list.append(species_entry)
 
@@ -308,30 +369,65 @@ def convert_to_quercus_format(hybrids, parent_name):
     }
 
 
+def scrape_parent(parent_name):
+    """Search one parent species (rate limiting happens per request)"""
+    return parent_name, search_hybrids(parent_name)
+
+
 def main():
     parser = argparse.ArgumentParser(description='Scrape hybrid oak data from iNaturalist')
-    parser.add_argument('parent_name', help='Parent species name (without Quercus prefix), e.g., "falcata"')
+    parser.add_argument('parent_names', nargs='+', metavar='parent_name',
+                        help='Parent species name(s) (without Quercus prefix), e.g., "falcata"')
     parser.add_argument('-o', '--output', default='inat_hybrids.json', help='Output JSON file (default: inat_hybrids.json)')
+    parser.add_argument('-v', '--verbose', action='store_true', help='Print per-result parsing diagnostics')
+    parser.add_argument('--compact', action='store_true', help='Write minified JSON instead of indented output')
 
     args = parser.parse_args()
 
-    print(f"Searching for hybrids of Quercus {args.parent_name}")
-
-    hybrids = search_hybrids(args.parent_name)
+    global VERBOSE
+    VERBOSE = args.verbose
+
+    if len(args.parent_names) == 1:
+        parent = args.parent_names[0]
+        print(f"Searching for hybrids of Quercus {parent}")
+        results = [(parent, search_hybrids(parent))]
+    else:
+        # Searches are I/O-bound; fan out over the shared session
+        print(f"Searching for hybrids of {len(args.parent_names)} parent species")
+        with ThreadPoolExecutor(max_workers=min(8, len(args.parent_names))) as pool:
+            results = list(pool.map(scrape_parent, args.parent_names))
+
+    # Convert to quercus_data.json format, combining all parents
+    all_species = []
+    total_hybrids = 0
+    for parent_name, hybrids in results:
+        if not hybrids:
+            print(f"No hybrids found for Quercus {parent_name}")
+            continue
+        total_hybrids += len(hybrids)
+        all_species.extend(convert_to_quercus_format(hybrids, parent_name)['species'])
 
-    if not hybrids:
+    if not all_species:
         print("No hybrids found")
         return
 
-    print(f"\nFound {len(hybrids)} hybrid(s)")
+    print(f"\nFound {total_hybrids} hybrid(s)")
 
-    # Convert to quercus_data.json format
-    output_data = convert_to_quercus_format(hybrids, args.parent_name)
+    output_data = {"species": all_species}
 
-    # Save to file
+    # Save to file (orjson keeps the indented encode in C when available)
     output_file = args.output
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(output_data, f, indent=2, ensure_ascii=False)
+    if orjson is not None:
+        option = 0 if args.compact else orjson.OPT_INDENT_2
+        with open(output_file, 'wb') as f:
+            f.write(orjson.dumps(output_data, option=option))
+    elif args.compact:
+        # Minified output skips the stdlib's slow indent path entirely
+        with open(output_file, 'w', encoding='utf-8') as f:
+            json.dump(output_data, f, ensure_ascii=False, separators=(',', ':'))
+    else:
+        with open(output_file, 'w', encoding='utf-8') as f:
+            json.dump(output_data, f, indent=2, ensure_ascii=False)
 
     print(f"\nData saved to {output_file}")
     print(f"Total hybrids: {len(output_data['species'])}")
@@ -16,25 +16,69 @@ Get an API token at: https://api.iucnredlist.org/users/sign_up
 import argparse
 import json
 import os
+import queue
 import sqlite3
 import sys
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Shared session: keep-alive avoids a fresh TLS handshake per species
+SESSION = requests.Session()
+SESSION.headers.update({"Accept": "application/json"})
+SESSION.mount(
+    "https://",
+    HTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=4,
+        max_retries=Retry(total=3, backoff_factor=1, status_forcelist=[500, 502, 503, 504]),
+    ),
+)
 
 # Configuration
 PROJECT_ROOT = Path(__file__).parent.parent.parent
 TMP_DIR = PROJECT_ROOT / "tmp" / "iucn"
 DB_PATH = PROJECT_ROOT / "cli" / "oak_compendium.db"
 
-PROGRESS_FILE = TMP_DIR / "iucn_progress.json"
+# Fetch results are cached here so reruns skip known answers; kept
+# out of oak_compendium.db, whose schema belongs to the CLI
+CACHE_DB = TMP_DIR / "iucn_cache.db"
+CACHE_MAX_AGE_DAYS = 90
+
+EVENTS_FILE = TMP_DIR / "iucn_events.jsonl"
+SUMMARY_FILE = TMP_DIR / "iucn_summary.json"
 DISCREPANCY_LOG = TMP_DIR / "conservation_discrepancies.log"
 ERROR_LOG = TMP_DIR / "iucn_errors.log"
 
 API_BASE = "https://api.iucnredlist.org/api/v4"
 DELAY_SECONDS = 2.0  # Be polite to the server
+MAX_RATE_LIMIT_RETRIES = 5
+
+# Global rate limiter shared by all fetch workers: holds requests at
+# least DELAY_SECONDS apart regardless of concurrency
+_rate_lock = threading.Lock()
+_last_request_ts = 0.0
+
+
+def rate_limit_wait():
+    """Block until it's polite to issue the next API request.
+
+    Sleeps only the remainder of DELAY_SECONDS since the previous
+    request was issued, so the network round trip of one request
+    counts against the delay budget of the next.
+    """
+    global _last_request_ts
+    with _rate_lock:
+        remaining = DELAY_SECONDS - (time.monotonic() - _last_request_ts)
+        if remaining > 0:
+            time.sleep(remaining)
+        _last_request_ts = time.monotonic()
 
 # IUCN conservation status codes
 VALID_STATUSES = {
@@ -56,17 +100,8 @@ def setup_directories():
 
 
 def load_progress():
-    """Load progress from previous run"""
-    if PROGRESS_FILE.exists():
-        try:
-            with open(PROGRESS_FILE, "r") as f:
-                progress = json.load(f)
-                print(f"Loaded progress: {len(progress.get('completed', []))} species already processed")
-                return progress
-        except json.JSONDecodeError:
-            print("Warning: Progress file corrupted, starting fresh")
-
-    return {
+    """Rebuild progress from the append-only event log"""
+    progress = {
         "completed": [],
         "failed": [],
         "not_found": [],
@@ -74,21 +109,60 @@ def load_progress():
         "discrepancies": [],
     }
 
-
-def save_progress(progress):
-    """Save current progress to disk"""
-    with open(PROGRESS_FILE, "w") as f:
+    if EVENTS_FILE.exists():
+        with open(EVENTS_FILE, "r") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    event = json.loads(line)
+                except json.JSONDecodeError:
+                    print("Warning: Skipping corrupted event log line")
+                    continue
+                record_event(progress, event)
+        print(f"Loaded progress: {len(progress['completed'])} species already processed")
+
+    return progress
+
+
+def record_event(progress, event):
+    """Fold one event into the in-memory progress dict"""
+    name = event["name"]
+    bucket = event["bucket"]
+    if bucket == "failed":
+        progress["failed"].append(name)
+        return
+    if bucket == "not_found":
+        progress["not_found"].append(name)
+    elif bucket == "updated":
+        progress["updated"].append(name)
+    elif bucket == "discrepancy":
+        progress["discrepancies"].append(event["detail"])
+    progress["completed"].append(name)
+
+
+def log_event(progress, name, bucket, detail=None):
+    """Record an event in memory and append it to the event log"""
+    event = {"name": name, "bucket": bucket}
+    if detail is not None:
+        event["detail"] = detail
+    record_event(progress, event)
+    with open(EVENTS_FILE, "a") as f:
+        f.write(json.dumps(event) + "\n")
+
+
+def save_summary(progress):
+    """Write the end-of-run summary snapshot"""
+    with open(SUMMARY_FILE, "w") as f:
         json.dump(progress, f, indent=2)
 
 
 def clear_progress():
-    """Clear progress file"""
-    if PROGRESS_FILE.exists():
-        PROGRESS_FILE.unlink()
-    if DISCREPANCY_LOG.exists():
-        DISCREPANCY_LOG.unlink()
-    if ERROR_LOG.exists():
-        ERROR_LOG.unlink()
+    """Clear progress files"""
+    for path in (EVENTS_FILE, SUMMARY_FILE, DISCREPANCY_LOG, ERROR_LOG):
+        if path.exists():
+            path.unlink()
 
 
 def log_discrepancy(message):
@@ -106,35 +180,116 @@ def log_error(message):
         f.write(f"[{timestamp}] {message}\n")
 
 
-def get_species_from_db():
-    """Get all species from the database"""
+def _connect():
+    """Open a DB connection tuned for this script's read/write pattern"""
     conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute(
-        "SELECT scientific_name, conservation_status, is_hybrid FROM oak_entries ORDER BY scientific_name"
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA cache_size=-64000")
+    return conn
+
+
+def _cache_connect():
+    """Open the local fetch cache, creating the table if needed"""
+    conn = sqlite3.connect(CACHE_DB)
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS iucn_cache ("
+        " scientific_name TEXT PRIMARY KEY,"
+        " status TEXT,"
+        " url TEXT,"
+        " checked_at TEXT,"
+        " found INTEGER,"
+        " etag TEXT)"
     )
-    species = cursor.fetchall()
-    conn.close()
-    return species
+    # Migrate caches created before the etag column existed
+    try:
+        conn.execute("ALTER TABLE iucn_cache ADD COLUMN etag TEXT")
+    except sqlite3.OperationalError:
+        pass
+    return conn
+
+
+def load_cached_names(conn):
+    """Names checked recently enough that no HTTP request is needed"""
+    rows = conn.execute(
+        "SELECT scientific_name FROM iucn_cache"
+        " WHERE checked_at > datetime('now', ?)",
+        (f"-{CACHE_MAX_AGE_DAYS} days",),
+    )
+    return {row[0] for row in rows}
 
 
-def update_conservation_status(scientific_name, status):
-    """Update conservation status in the database"""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute(
-        "UPDATE oak_entries SET conservation_status = ? WHERE scientific_name = ?",
-        (status, scientific_name),
+def load_cache_etags(conn):
+    """Prior (status, url, etag) per species, for conditional GETs"""
+    rows = conn.execute(
+        "SELECT scientific_name, status, url, etag FROM iucn_cache WHERE etag IS NOT NULL"
+    )
+    return {row[0]: (row[1], row[2], row[3]) for row in rows}
+
+
+def cache_result(conn, scientific_name, status, url, found, etag=None):
+    """Remember a definitive fetch result for future runs"""
+    conn.execute(
+        "INSERT OR REPLACE INTO iucn_cache"
+        " (scientific_name, status, url, checked_at, found, etag)"
+        " VALUES (?, ?, ?, datetime('now'), ?, ?)",
+        (scientific_name, status, url, int(found), etag),
+    )
+
+
+def get_species_from_db(conn):
+    """Get all species from the database"""
+    cursor = conn.execute(
+        "SELECT scientific_name, conservation_status, is_hybrid FROM oak_entries ORDER BY scientific_name"
     )
+    return cursor.fetchall()
+
+
+# Status updates flow through this queue to a background writer
+# thread, keeping SQLite commits off the fetch loop's critical path
+_write_queue = queue.Queue()
+
+
+def queue_status_update(scientific_name, status):
+    """Hand a conservation status update to the writer thread"""
+    _write_queue.put((status, scientific_name))
+
+
+def status_writer():
+    """Consume queued status updates on a dedicated connection.
+
+    Runs until a None sentinel arrives. Commits are batched every 50
+    updates and once at shutdown; sqlite3 connections are bound to
+    their creating thread, so the writer opens its own.
+    """
+    conn = _connect()
+    uncommitted = 0
+    while True:
+        item = _write_queue.get()
+        if item is None:
+            break
+        conn.execute(
+            "UPDATE oak_entries SET conservation_status = ? WHERE scientific_name = ?",
+            item,
+        )
+        uncommitted += 1
+        if uncommitted >= 50:
+            conn.commit()
+            uncommitted = 0
     conn.commit()
     conn.close()
 
 
-def fetch_iucn_status(scientific_name, token):
+def fetch_iucn_status(scientific_name, token, cached=None):
     """
     Fetch conservation status from IUCN API v4.
 
-    Returns tuple: (status_code, assessment_url) or (None, None) if not found
+    cached is the prior (status, url, etag) triple for this species,
+    if any; its ETag is sent as If-None-Match so an unchanged
+    assessment comes back as a tiny 304 with no JSON to parse.
+
+    Returns tuple: (status_code, assessment_url, result, etag)
     """
     # IUCN expects genus and species separately
     # Our species names are like "alba" (without Quercus prefix)
@@ -144,41 +299,51 @@ def fetch_iucn_status(scientific_name, token):
     # Handle hybrids - they typically won't be in IUCN
     # The is_hybrid check is done in the main loop, but also check name patterns as fallback
     if "×" in species or " x " in species or species.startswith("x "):
-        return None, None, "hybrid"
+        return None, None, "hybrid", None
 
     url = f"{API_BASE}/taxa/scientific_name"
     params = {
         "genus_name": genus,
         "species_name": species,
     }
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Accept": "application/json",
-    }
+    # Token isn't known at import time, so Authorization stays per-call
+    headers = {"Authorization": f"Bearer {token}"}
+    if cached and cached[2]:
+        headers["If-None-Match"] = cached[2]
 
     try:
-        time.sleep(DELAY_SECONDS)
-        response = requests.get(url, params=params, headers=headers, timeout=30)
+        # Retry rate-limited requests in a bounded loop with
+        # exponential backoff rather than recursing
+        for attempt in range(MAX_RATE_LIMIT_RETRIES):
+            rate_limit_wait()
+            response = SESSION.get(url, params=params, headers=headers, timeout=30)
+            if response.status_code != 429:
+                break
+            backoff = min(60 * 2 ** attempt, 300)
+            print(f"  [RATE LIMITED] Waiting {backoff} seconds...")
+            time.sleep(backoff)
+        else:
+            log_error(f"{scientific_name}: still rate limited after {MAX_RATE_LIMIT_RETRIES} attempts")
+            return None, None, "rate_limited", None
 
         if response.status_code == 401:
             print("ERROR: Invalid API token")
             sys.exit(1)
+        elif response.status_code == 304:
+            # Assessment unchanged since we last saw it
+            return cached[0], cached[1], "success", cached[2]
         elif response.status_code == 404:
-            return None, None, "not_found"
-        elif response.status_code == 429:
-            print("  [RATE LIMITED] Waiting 60 seconds...")
-            time.sleep(60)
-            return fetch_iucn_status(scientific_name, token)
+            return None, None, "not_found", None
         elif response.status_code != 200:
             log_error(f"{scientific_name}: HTTP {response.status_code} - {response.text}")
-            return None, None, f"http_{response.status_code}"
+            return None, None, f"http_{response.status_code}", None
 
         data = response.json()
 
         # The API returns assessments for the species
         # We need to find the latest assessment and get its category
         if not data.get("assessments") or len(data["assessments"]) == 0:
-            return None, None, "no_assessments"
+            return None, None, "no_assessments", None
 
         # Get the latest assessment (should be first, but let's be safe)
         latest = None
@@ -195,20 +360,20 @@ def fetch_iucn_status(scientific_name, token):
         assessment_url = latest.get("url", "")
 
         if category and category in VALID_STATUSES:
-            return category, assessment_url, "success"
+            return category, assessment_url, "success", response.headers.get("ETag")
         else:
             log_error(f"{scientific_name}: Unknown category: {category}")
-            return None, None, "unknown_category"
+            return None, None, "unknown_category", None
 
     except requests.exceptions.Timeout:
         log_error(f"{scientific_name}: Request timeout")
-        return None, None, "timeout"
+        return None, None, "timeout", None
     except requests.exceptions.RequestException as e:
         log_error(f"{scientific_name}: Request error: {e}")
-        return None, None, "request_error"
+        return None, None, "request_error", None
     except json.JSONDecodeError as e:
         log_error(f"{scientific_name}: JSON decode error: {e}")
-        return None, None, "json_error"
+        return None, None, "json_error", None
 
 
 def main():
@@ -236,6 +401,12 @@ def main():
         default=0,
         help="Limit number of species to process (0 = all)",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of concurrent fetch workers (default: 1, serial)",
+    )
     args = parser.parse_args()
 
     setup_directories()
@@ -245,7 +416,10 @@ def main():
         print("Cleared previous progress")
 
     progress = load_progress()
-    species_list = get_species_from_db()
+    # One main-thread connection for the run; the writer thread opens
+    # its own because sqlite3 connections are thread-bound
+    db_conn = _connect()
+    species_list = get_species_from_db(db_conn)
 
     print(f"\nFound {len(species_list)} species in database")
     print(f"Already processed: {len(progress['completed'])}")
@@ -254,46 +428,81 @@ def main():
         print("DRY RUN MODE - No database changes will be made")
     print()
 
-    processed = 0
-    for scientific_name, current_status, is_hybrid in species_list:
-        if scientific_name in progress["completed"]:
+    cache_conn = _cache_connect()
+    cached = load_cached_names(cache_conn)
+    # Snapshot etags on the main thread; the cache connection can't be
+    # shared with fetch workers
+    etags = load_cache_etags(cache_conn)
+    if cached:
+        print(f"Cache: {len(cached)} species checked within {CACHE_MAX_AGE_DAYS} days")
+
+    # Set-based lookups: the completed list grows to hundreds of
+    # entries and is probed once per species below
+    completed_set = set(progress["completed"])
+
+    # Work out the batch up front so fetches can overlap; hybrids never
+    # hit the API and are resolved without a worker round-trip
+    to_process = []
+    skipped_cached = 0
+    for entry in species_list:
+        if entry[0] in completed_set:
             continue
-
-        if args.limit > 0 and processed >= args.limit:
-            print(f"\nReached limit of {args.limit} species")
+        if entry[0] in cached:
+            skipped_cached += 1
+            continue
+        if args.limit > 0 and len(to_process) >= args.limit:
+            print(f"Limiting to {args.limit} species\n")
             break
+        to_process.append(entry)
+    if skipped_cached:
+        print(f"Skipping {skipped_cached} recently checked species (cache)\n")
 
-        processed += 1
-        print(f"[{processed}/{len(species_list) - len(progress['completed'])}] Quercus {scientific_name}...", end=" ")
-
-        # Skip hybrids - they aren't in IUCN Red List
+    def fetch_one(entry):
+        scientific_name, current_status, is_hybrid = entry
         if is_hybrid:
-            print("skipped (hybrid)")
-            progress["completed"].append(scientific_name)
-            continue
+            return entry, (None, None, "hybrid", None)
+        return entry, fetch_iucn_status(
+            scientific_name, args.token, cached=etags.get(scientific_name)
+        )
+
+    writer_thread = threading.Thread(target=status_writer, daemon=True)
+    writer_thread.start()
+
+    # Fetches fan out across workers; results come back in submission
+    # order and all bookkeeping stays on the main thread
+    if args.workers > 1:
+        executor = ThreadPoolExecutor(max_workers=args.workers)
+        results = executor.map(fetch_one, to_process)
+    else:
+        executor = None
+        results = map(fetch_one, to_process)
 
-        iucn_status, url, result = fetch_iucn_status(scientific_name, args.token)
+    processed = 0
+    for (scientific_name, current_status, is_hybrid), (iucn_status, url, result, etag) in results:
+        processed += 1
+        print(f"[{processed}/{len(to_process)}] Quercus {scientific_name}...", end=" ")
 
         if result == "hybrid":
             print("skipped (hybrid)")
-            progress["completed"].append(scientific_name)
+            log_event(progress, scientific_name, "completed")
         elif result == "not_found" or result == "no_assessments":
             print("not in IUCN")
-            progress["not_found"].append(scientific_name)
-            progress["completed"].append(scientific_name)
+            log_event(progress, scientific_name, "not_found")
+            cache_result(cache_conn, scientific_name, None, None, False)
         elif result != "success":
             print(f"error: {result}")
-            progress["failed"].append(scientific_name)
+            log_event(progress, scientific_name, "failed")
         else:
             # Successfully got IUCN status
             status_name = VALID_STATUSES.get(iucn_status, iucn_status)
+            cache_result(cache_conn, scientific_name, iucn_status, url, True, etag)
 
             if current_status and current_status != iucn_status:
                 # Discrepancy between database and IUCN
                 log_discrepancy(
                     f"Quercus {scientific_name}: DB={current_status}, IUCN={iucn_status} ({status_name})"
                 )
-                progress["discrepancies"].append({
+                log_event(progress, scientific_name, "discrepancy", detail={
                     "species": scientific_name,
                     "db_status": current_status,
                     "iucn_status": iucn_status,
@@ -302,20 +511,28 @@ def main():
                 print(f"DISCREPANCY: {current_status} → {iucn_status}")
             elif current_status == iucn_status:
                 print(f"{iucn_status} (matches)")
+                log_event(progress, scientific_name, "completed")
             else:
                 # No existing status, update it
                 if not args.dry_run:
-                    update_conservation_status(scientific_name, iucn_status)
+                    queue_status_update(scientific_name, iucn_status)
                 print(f"{iucn_status} ({status_name}) - UPDATED")
-                progress["updated"].append(scientific_name)
+                log_event(progress, scientific_name, "updated")
+
+        if processed % 50 == 0:
+            cache_conn.commit()
 
-            progress["completed"].append(scientific_name)
+    if executor is not None:
+        executor.shutdown()
 
-        # Save progress every 10 species
-        if processed % 10 == 0:
-            save_progress(progress)
+    cache_conn.commit()
+    cache_conn.close()
+    db_conn.close()
 
-    save_progress(progress)
+    # Drain the writer before summarizing
+    _write_queue.put(None)
+    writer_thread.join()
+    save_summary(progress)
 
     # Summary
     print("\n" + "=" * 60)
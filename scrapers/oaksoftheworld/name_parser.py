@@ -4,43 +4,74 @@ Name parser for Quercus species list
 Parses liste.htm according to rules in docs/parsing_rules.txt
 """
 
+import io
+import multiprocessing
 import re
 import html
 from urllib.parse import urljoin
 from utils import log_inconsistency
 
-
-def extract_links_from_line(line):
+# Patterns compiled once at import; these all run inside the per-line
+# hot loop of parse_species_list_html
+# Non-greedy match to get content between <a> and </a>
+_LINK_RE = re.compile(r'<a\s+href="(quercus_[^"]+\.htm)"[^>]*>(.*?)</a>', re.IGNORECASE)
+_SPECIES_URL_RE = re.compile(r'quercus_([^.]+)\.htm', re.IGNORECASE)
+_TAG_RE = re.compile(r'<[^>]+>')
+_PAREN_NOTE_RE = re.compile(r'^\s*\([^()]+\)\s+')
+_HYBRID_MARKER_RE = re.compile(r'^\(x\)$', re.IGNORECASE)
+_SEE_RE = re.compile(r':\s*see:?\s+', re.IGNORECASE)
+_EQUALS_RE = re.compile(r'\s*=\s+')
+_STARTS_WITH_LINK_RE = re.compile(r'^\s*(?:<[^>]+>)*\s*<a\s+href="quercus_', re.IGNORECASE)
+_LEADING_X_RE = re.compile(r'^[×x]\s*', re.IGNORECASE)
+_X_MARKER_RE = re.compile(r'\(x\)|x\.', re.IGNORECASE)
+# Matches either a full quercus anchor or any other HTML tag, so one
+# scan can collect links and strip markup at the same time
+_LINK_OR_TAG_RE = re.compile(
+    r'<a\s+href="(quercus_[^"]+\.htm)"[^>]*>(.*?)</a>|<[^>]+>', re.IGNORECASE
+)
+
+
+def scan_line(line):
     """
-    Extract all quercus links from a line.
-    Returns list of (href, link_text) tuples.
+    Extract all quercus links and the visible text of a line in a
+    single pass. Returns (links, visible_text) where links is a list
+    of (href, link_text) tuples.
     """
     links = []
-    # Pattern uses non-greedy match to get content between <a> and </a>
-    pattern = r'<a\s+href="(quercus_[^"]+\.htm)"[^>]*>(.*?)</a>'
 
-    for match in re.finditer(pattern, line, re.IGNORECASE):
+    def _collect(match):
         href = match.group(1)
-        link_html = match.group(2)
-        # Strip HTML tags from link text and decode HTML entities
-        link_text = re.sub(r'<[^>]+>', '', link_html).strip()
-        link_text = html.unescape(link_text)
-        links.append((href, link_text))
+        if href is None:
+            # Plain tag: contributes nothing to the visible text
+            return ''
+        # Anchor: record the link, keep its inner text visible
+        link_text = _TAG_RE.sub('', match.group(2)).strip()
+        links.append((href, html.unescape(link_text)))
+        return link_text
 
-    return links
+    visible_text = _LINK_OR_TAG_RE.sub(_collect, line)
+    return links, html.unescape(visible_text).strip()
+
+
+def extract_links_from_line(line):
+    """
+    Extract all quercus links from a line.
+    Returns list of (href, link_text) tuples.
+    """
+    return scan_line(line)[0]
 
 
 def extract_species_from_url(url):
     """
     Extract species name from URL like 'quercus_alba.htm' -> 'alba'
     """
-    match = re.search(r'quercus_([^.]+)\.htm', url, re.IGNORECASE)
+    match = _SPECIES_URL_RE.search(url)
     return match.group(1) if match else None
 
 
 def strip_html_tags(text):
     """Remove all HTML tags from text and decode HTML entities"""
-    text = re.sub(r'<[^>]+>', '', text).strip()
+    text = _TAG_RE.sub('', text).strip()
     return html.unescape(text)
 
 
@@ -68,11 +99,11 @@ def strip_parenthetical_notes(text):
     while True:
         # Match: optional whitespace, open paren, content (not containing parens),
         # close paren, followed by whitespace (not attached to next word)
-        match = re.match(r'^\s*\([^()]+\)\s+', text)
+        match = _PAREN_NOTE_RE.match(text)
         if match:
             # Check if this looks like a hybrid marker (x) or (X)
             content = match.group(0).strip()
-            if re.match(r'^\(x\)$', content, re.IGNORECASE):
+            if _HYBRID_MARKER_RE.match(content):
                 break  # Don't strip hybrid markers
             text = text[match.end():]
         else:
@@ -86,7 +117,10 @@ def is_hybrid(text):
     Check if text contains hybrid markers: (x) or x.
     Note: Don't rely on whitespace around markers
     """
-    return bool(re.search(r'\(x\)|×|x\.', text, re.IGNORECASE))
+    # Three literal substring scans beat a regex here; × has no case
+    # so only the x markers need the lowered copy
+    lowered = text.lower()
+    return '×' in text or '(x)' in lowered or 'x.' in lowered
 
 
 def parse_line(line, base_url):
@@ -104,8 +138,13 @@ def parse_line(line, base_url):
     """
     line = line.strip()
 
-    # Extract all links
-    links = extract_links_from_line(line)
+    # Cheap pre-filter: most lines of the HTML are markup noise with
+    # no quercus link at all, so skip them before any regex runs
+    if 'quercus_' not in line:
+        return None
+
+    # Extract links and visible text in one scan over the line
+    links, visible_text = scan_line(line)
 
     if not links:
         # Every line MUST contain at least one link per rules otherwise it is not something we care about
@@ -114,7 +153,7 @@ def parse_line(line, base_url):
     # Check if all links match
     unique_hrefs = set(href for href, _ in links)
     if len(unique_hrefs) > 1:
-        log_inconsistency(f"Multiple different links in line: {unique_hrefs} - Line: {strip_html_tags(line)}")
+        log_inconsistency(f"Multiple different links in line: {unique_hrefs} - Line: {visible_text}")
 
     # Use the link (first one if multiple)
     main_href = links[0][0]
@@ -123,25 +162,24 @@ def parse_line(line, base_url):
     # Extract species name from URL (this is the source of truth per rules)
     species_from_url = extract_species_from_url(main_href)
     if not species_from_url:
-        log_inconsistency(f"Could not extract a species name for Line: {strip_html_tags(line)}")
+        log_inconsistency(f"Could not extract a species name for Line: {visible_text}")
         return None
 
-    # Get visible text (strip all HTML)
-    visible_text = strip_html_tags(line)
-
     # Determine entry type and parse accordingly
 
     # Check for SYNONYM_SEE (contains ': see' or ':see' with possible :)
-    if re.search(r':\s*see:?\s+', visible_text, re.IGNORECASE):
+    # The substring checks are necessary conditions for the regexes,
+    # hoisted out as fast C-level guards
+    if ':' in visible_text and _SEE_RE.search(visible_text):
         return parse_synonym_see(visible_text, main_url, species_from_url, line)
 
     # Check for SYNONYM_EQUALS (contains '=' with optional spaces before it)
-    if re.search(r'\s*=\s+', visible_text):
+    if '=' in visible_text and _EQUALS_RE.search(visible_text):
         return parse_synonym_equals(visible_text, main_url, species_from_url, line)
 
     # Check if line starts with a link (ACCEPTED_SPECIES or ACCEPTED_HYBRID)
     # Allow optional tags (like <font>) before the link
-    if re.match(r'^\s*(?:<[^>]+>)*\s*<a\s+href="quercus_', line, re.IGNORECASE):
+    if _STARTS_WITH_LINK_RE.match(line):
         # Check for hybrid markers
         if is_hybrid(visible_text):
             return parse_accepted_hybrid(visible_text, main_url, species_from_url, line)
@@ -157,20 +195,15 @@ def parse_accepted_species(visible_text, url, species_from_url, raw_line):
     Parse ACCEPTED_SPECIES: everything after species name is author
     """
     # Extract first word as species name from text
-    words = visible_text.split()
-    if not words:
+    parts = visible_text.split(maxsplit=1)
+    if not parts:
         return None
 
-    species_from_text = words[0].strip()
+    species_from_text = parts[0]
     # Get the rest and strip parenthetical notes before extracting author
-    remainder = ' '.join(words[1:]).strip() if len(words) > 1 else ''
-    remainder = strip_parenthetical_notes(remainder)
+    remainder = strip_parenthetical_notes(parts[1]) if len(parts) > 1 else ''
     author = remainder if remainder else None
 
-    # Ensure author is None if it's empty
-    if author and not author.strip():
-        author = None
-
     # Check if text name matches URL name
     if species_from_text.lower() != species_from_url.lower():
         log_inconsistency(f"Species name mismatch: text='{species_from_text}' vs URL='{species_from_url}'. Using URL name.")
@@ -197,28 +230,21 @@ def parse_accepted_hybrid(visible_text, url, species_from_url, raw_line):
     # First, check if it starts with × or x
     if visible_text.startswith('×') or visible_text.lower().startswith('x '):
         # Format: × name author
-        text_after_x = re.sub(r'^[×x]\s*', '', visible_text, flags=re.IGNORECASE).strip()
-        words = text_after_x.split()
-        species_from_text = words[0].strip() if words else None
-        remainder = ' '.join(words[1:]).strip() if len(words) > 1 else ''
+        text_after_x = _LEADING_X_RE.sub('', visible_text).strip()
+        parts = text_after_x.split(maxsplit=1)
     else:
         # Format: name (x) author or name(x)author
         # Remove (x) and x. markers
-        text_no_marker = re.sub(r'\(x\)|x\.', '', visible_text, flags=re.IGNORECASE).strip()
-        words = text_no_marker.split()
-        species_from_text = words[0].strip() if words else None
-        remainder = ' '.join(words[1:]).strip() if len(words) > 1 else ''
+        text_no_marker = _X_MARKER_RE.sub('', visible_text).strip()
+        parts = text_no_marker.split(maxsplit=1)
+
+    species_from_text = parts[0] if parts else None
+    remainder = parts[1] if len(parts) > 1 else ''
 
     # Strip parenthetical notes before extracting author
     remainder = strip_parenthetical_notes(remainder)
     author = remainder if remainder else None
 
-    # Ensure author is None if it's empty or just whitespace
-    if author and not author.strip():
-        author = None
-    elif author:
-        author = author.strip()
-
     # Check if text name matches URL name
     if species_from_text and species_from_text.lower() != species_from_url.lower():
         log_inconsistency(f"Hybrid name mismatch: text='{species_from_text}' vs URL='{species_from_url}'. Using URL name.")
@@ -244,7 +270,7 @@ def parse_synonym_equals(visible_text, url, species_from_url, raw_line):
     - "castaneifolia Morrison, non C.A.Mey.= acutissima"
     """
     # Split on = with optional space before and required space after
-    parts = re.split(r'\s*=\s+', visible_text, maxsplit=1)
+    parts = _EQUALS_RE.split(visible_text, maxsplit=1)
     if len(parts) != 2:
         return None
 
@@ -252,46 +278,34 @@ def parse_synonym_equals(visible_text, url, species_from_url, raw_line):
     accepted_part = parts[1].strip()
 
     # Extract synonym name and author (first word is name, rest is author)
-    synonym_words = synonym_part.split()
-    synonym_name = synonym_words[0].strip() if synonym_words else None
-    synonym_remainder = ' '.join(synonym_words[1:]).strip() if len(synonym_words) > 1 else ''
+    synonym_parts = synonym_part.split(maxsplit=1)
+    synonym_name = synonym_parts[0] if synonym_parts else None
+    synonym_remainder = synonym_parts[1] if len(synonym_parts) > 1 else ''
     # Strip parenthetical notes before extracting author
     synonym_remainder = strip_parenthetical_notes(synonym_remainder)
     synonym_author = synonym_remainder if synonym_remainder else None
 
-    # Ensure synonym author is None if empty
-    if synonym_author and not synonym_author.strip():
-        synonym_author = None
-
     # Extract accepted name and author from right side - we might have an x signifying a hybrid, ignore that
-    accepted_words = accepted_part.split()
+    accepted_parts = accepted_part.split(maxsplit=2)
 
-    if accepted_words and accepted_words[0].strip().lower() == "x" and len(accepted_words) > 1:
+    if accepted_parts and accepted_parts[0].lower() == "x" and len(accepted_parts) > 1:
         # Case 1: First word is "x" and there's a second word.
-        # The name is the second word (accepted_words[1]).
-        accepted_name_text = accepted_words[1].strip()
-        # The remaining words for the author start from index 2.
-        author_words = accepted_words[2:]
-    elif accepted_words:
-        # Case 2: accepted_words is not empty, but Case 1 is false.
-        # The name is the first word (accepted_words[0]).
-        accepted_name_text = accepted_words[0].strip()
-        # The remaining words for the author start from index 1.
-        author_words = accepted_words[1:]
+        # The name is the second word; the author follows it.
+        accepted_name_text = accepted_parts[1]
+        accepted_remainder = accepted_parts[2] if len(accepted_parts) > 2 else ''
+    elif accepted_parts:
+        # Case 2: The name is the first word; the author follows it.
+        accepted_name_text = accepted_parts[0]
+        accepted_remainder = ' '.join(accepted_parts[1:])
     else:
-        # Case 3: accepted_words is empty.
+        # Case 3: accepted_parts is empty.
         accepted_name_text = None
-        author_words = []
+        accepted_remainder = ''
 
-    # Join the determined remaining author_words and strip parenthetical notes
-    accepted_remainder = ' '.join(author_words).strip() if author_words else ''
+    # Strip parenthetical notes before extracting author
     accepted_remainder = strip_parenthetical_notes(accepted_remainder)
     accepted_author = accepted_remainder if accepted_remainder else None
 
-    # Ensure accepted author is None if empty
-    if accepted_author and not accepted_author.strip():
-        accepted_author = None
-
     # Check if accepted name from text matches URL
     if accepted_name_text and accepted_name_text.lower() != species_from_url.lower():
         log_inconsistency(f"Synonym target mismatch: text='{accepted_name_text}' vs URL='{species_from_url}'. Using URL name. Line: {raw_line}")
@@ -319,7 +333,7 @@ def parse_synonym_see(visible_text, url, species_from_url, raw_line):
     Before ':' may have comma-separated list of synonyms
     Possibly could have see or see:
     """
-    parts = re.split(r':\s*see:?\s+', visible_text, maxsplit=1, flags=re.IGNORECASE)
+    parts = _SEE_RE.split(visible_text, maxsplit=1)
     if len(parts) != 2:
         return None
 
@@ -332,17 +346,13 @@ def parse_synonym_see(visible_text, url, species_from_url, raw_line):
         syn = syn.strip()
         if syn:
             # Extract name and author
-            syn_words = syn.split()
-            syn_name = syn_words[0].strip() if syn_words else None
-            syn_remainder = ' '.join(syn_words[1:]).strip() if len(syn_words) > 1 else ''
+            syn_parts = syn.split(maxsplit=1)
+            syn_name = syn_parts[0] if syn_parts else None
+            syn_remainder = syn_parts[1] if len(syn_parts) > 1 else ''
             # Strip parenthetical notes before extracting author
             syn_remainder = strip_parenthetical_notes(syn_remainder)
             syn_author = syn_remainder if syn_remainder else None
 
-            # Ensure author is None if empty
-            if syn_author and not syn_author.strip():
-                syn_author = None
-
             if syn_name:
                 synonym_entries.append({
                     'name': syn_name,
@@ -350,17 +360,13 @@ def parse_synonym_see(visible_text, url, species_from_url, raw_line):
                 })
 
     # Extract accepted name and author
-    accepted_words = accepted_part.split()
-    accepted_name_text = accepted_words[0].strip() if accepted_words else None
-    accepted_remainder = ' '.join(accepted_words[1:]).strip() if len(accepted_words) > 1 else ''
+    accepted_parts = accepted_part.split(maxsplit=1)
+    accepted_name_text = accepted_parts[0] if accepted_parts else None
+    accepted_remainder = accepted_parts[1] if len(accepted_parts) > 1 else ''
     # Strip parenthetical notes before extracting author
     accepted_remainder = strip_parenthetical_notes(accepted_remainder)
     accepted_author = accepted_remainder if accepted_remainder else None
 
-    # Ensure author is None if empty
-    if accepted_author and not accepted_author.strip():
-        accepted_author = None
-
     # Check if accepted name matches URL
     if accepted_name_text and accepted_name_text.lower() != species_from_url.lower():
         log_inconsistency(f"Synonym target mismatch: text='{accepted_name_text}' vs URL='{species_from_url}'. Using URL name.")
@@ -422,15 +428,67 @@ def parse_other_link(visible_text, url, species_from_url, raw_line):
     }
 
 
-def parse_species_list_html(html, base_url):
+def _parse_chunk(args):
+    """
+    Parse a contiguous block of lines in a worker process.
+
+    Inconsistency messages are buffered and returned instead of
+    written, so the parent can flush them to the shared log without
+    the workers contending on the file.
+    """
+    global log_inconsistency
+    lines, base_url = args
+    buffered = []
+    original = log_inconsistency
+    log_inconsistency = buffered.append
+    try:
+        parsed = [p for p in (parse_line(line, base_url) for line in lines) if p]
+    finally:
+        log_inconsistency = original
+    return parsed, buffered
+
+
+def _parsed_entries(stream, base_url, workers):
+    """Yield parsed line dicts, fanning out across processes if asked"""
+    if workers <= 1:
+        for line in stream:
+            parsed = parse_line(line, base_url)
+            if parsed:
+                yield parsed
+        return
+
+    # Contiguous chunks keep the merged output in document order
+    lines = stream.read().split('\n') if hasattr(stream, 'read') else list(stream)
+    chunk_size = max(1, (len(lines) + workers - 1) // workers)
+    chunks = [
+        (lines[i:i + chunk_size], base_url)
+        for i in range(0, len(lines), chunk_size)
+    ]
+    with multiprocessing.Pool(workers) as pool:
+        for parsed_list, buffered in pool.imap(_parse_chunk, chunks):
+            for message in buffered:
+                log_inconsistency(message)
+            yield from parsed_list
+
+
+def parse_species_list_html(html_source, base_url, workers=1):
     """
     Parse the entire liste.htm file
 
+    Accepts either the full file as a string or an open text stream
+    (e.g. a file handle), which avoids materialising a list of every
+    line up front. With workers > 1, line parsing is distributed
+    across a multiprocessing pool (parse_line has no cross-line
+    state); aggregation still happens here in a single pass.
+
     Returns:
     - accepted_species: list of accepted species dicts
     - synonym_map: dict mapping synonym names to accepted names
     """
-    lines = html.split('\n')
+    if isinstance(html_source, str):
+        stream = io.StringIO(html_source)
+    else:
+        stream = html_source
 
     accepted_species = {}  # key: species_name, value: species dict
     synonym_map = {}  # key: synonym_name, value: accepted_name
@@ -438,12 +496,7 @@ def parse_species_list_html(html, base_url):
     print("\nParsing species list with new parser...")
 
     parsed_count = 0
-    for line_num, line in enumerate(lines, 1):
-        parsed = parse_line(line, base_url)
-
-        if not parsed:
-            continue
-
+    for parsed in _parsed_entries(stream, base_url, workers):
         parsed_count += 1
         entry_type = parsed['entry_type']
         species_name = parsed['species_name']
@@ -468,18 +521,6 @@ def parse_species_list_html(html, base_url):
                     accepted_species[species_name]['is_hybrid'] = True
 
         elif entry_type in ['SYNONYM_EQUALS', 'SYNONYM_SEE', 'OTHER_LINK']:
-            # This entry represents synonyms
-            for syn in parsed['synonyms']:
-                syn_name = syn['name']
-                if syn_name:
-                    # Support multiple mappings per synonym name
-                    if syn_name not in synonym_map:
-                        synonym_map[syn_name] = []
-                    synonym_map[syn_name].append({
-                        'accepted_name': species_name,
-                        'synonym_author': syn['author']
-                    })
-
             # Make sure the accepted species exists
             if species_name not in accepted_species:
                 accepted_species[species_name] = {
@@ -490,16 +531,22 @@ def parse_species_list_html(html, base_url):
                     'synonyms': []
                 }
 
-    # Build synonym lists for each accepted species
-    for syn_name, syn_mappings in synonym_map.items():
-        # syn_mappings is now a list of dicts
-        for syn_info in syn_mappings:
-            accepted_name = syn_info['accepted_name']
-            if accepted_name in accepted_species:
-                accepted_species[accepted_name]['synonyms'].append({
-                    'name': syn_name,
-                    'author': syn_info['synonym_author']
-                })
+            # Attach synonyms to the accepted species directly and
+            # record the reverse mapping in the same pass
+            for syn in parsed['synonyms']:
+                syn_name = syn['name']
+                if syn_name:
+                    accepted_species[species_name]['synonyms'].append({
+                        'name': syn_name,
+                        'author': syn['author']
+                    })
+                    # Support multiple mappings per synonym name
+                    if syn_name not in synonym_map:
+                        synonym_map[syn_name] = []
+                    synonym_map[syn_name].append({
+                        'accepted_name': species_name,
+                        'synonym_author': syn['author']
+                    })
 
     # Calculate synonym statistics
     total_synonym_mappings = sum(len(mappings) for mappings in synonym_map.values())
@@ -4,11 +4,108 @@ Parser functions for the Quercus scraper
 Handles parsing of HTML pages and data extraction
 """
 
-from bs4 import BeautifulSoup
 import re
+import sys
+from collections import namedtuple
 from urllib.parse import urljoin
+
+import lxml.html
+
 from utils import log_inconsistency
 
+# Patterns compiled once at import; these run in per-line and
+# per-species loops
+_URL_SPECIES_RE = re.compile(r'quercus_(\w+)\.htm')
+_SEE_RE = re.compile(r':\s*see\s+', re.IGNORECASE)
+_SUBGENUS_RE = re.compile(r'Sub-genus\s+(\w+)', re.IGNORECASE)
+_SECTION_RE = re.compile(r'Section\s+(\w+)', re.IGNORECASE)
+_SERIES_RE = re.compile(r'Series\s+(\w+)', re.IGNORECASE)
+_SUBSECTION_RE = re.compile(r'subsection\s+(\w+)', re.IGNORECASE)
+_IUCN_RE = re.compile(r'IUCN.*?:\s*([A-Z]{2})', re.IGNORECASE)
+_HYBRID_FORMULA_RE = re.compile(r'([a-zA-Z]{3,})\s*[xX×]\s*([a-zA-Z]{3,})')
+# Common non-species words that look like formula operands
+_INVALID_PARENT_WORDS = frozenset({'var', 'subsp', 'nom', 'non', 'nec', 'illeg', 'inval'})
+_SPLIT_LIST_RE = re.compile(r'[;,]')
+# Header/navigation lines skipped by the list-page dispatcher; one
+# alternation scan replaces four separate substring probes
+_SKIP_LINE_RE = re.compile(r'list of species|accepted names|warning|names of hybrids')
+
+
+# Table labels every species page repeats; interned once so the
+# per-page label strings collapse to canonical objects and dict probes
+# in parse_species_page hit the identity fast path
+_LABELS = {sys.intern(label) for label in (
+    'author', 'synonyms', 'local names', 'range', 'growth habit',
+    'leaves', 'flowers', 'fruits', 'bark, twigs and',
+    'hardiness zone, habitat', 'miscellaneous',
+    'subspecies and varieties',
+)}
+
+# Everything the list-page line dispatcher needs, computed in one pass
+# per line so the case branches never rescan the string
+_LineInfo = namedtuple('_LineInfo', ['text', 'has_hybrid_marker', 'has_eq', 'has_colon', 'has_see', 'tokens'])
+
+
+def _classify_line(line, line_lower):
+    """Tokenize and flag one list-page line for the case dispatcher"""
+    has_hybrid_marker = '(x)' in line
+    text = line.replace('(x)', '').strip()
+    has_eq = '=' in text
+    has_colon = ':' in text
+    has_see = has_colon and (': see ' in line_lower or ':see ' in line_lower)
+    # Tokens are only consumed by the accepted-name case, which never
+    # fires for '='/':' lines
+    tokens = text.split() if not has_eq and not has_colon else None
+    return _LineInfo(text, has_hybrid_marker, has_eq, has_colon, has_see, tokens)
+
+
+# Hybrid-marker probes memoized per unique name; the same accepted
+# names recur across many synonym lines
+_hybrid_cache = {}
+
+
+def _is_hybrid_name(name):
+    """True if the name carries a hybrid marker ('×' or ' x ')"""
+    result = _hybrid_cache.get(name)
+    if result is None:
+        result = '×' in name or ' x ' in name
+        _hybrid_cache[name] = result
+    return result
+
+
+def _iter_text_lines(tree):
+    """Yield stripped, non-empty text lines from the parsed document
+
+    Streams itertext() fragments through a small carry buffer instead
+    of materializing the whole body text; the lines produced are
+    identical to tree.text_content().split('\\n').
+    """
+    pending = ''
+    for chunk in tree.itertext():
+        if '\n' not in chunk:
+            pending += chunk
+            continue
+        parts = (pending + chunk).split('\n')
+        pending = parts.pop()
+        for part in parts:
+            part = part.strip()
+            if part:
+                yield part
+    pending = pending.strip()
+    if pending:
+        yield pending
+
+
+def _text_joined(element):
+    """Concatenate stripped text segments (BeautifulSoup get_text(strip=True))"""
+    return ''.join(s.strip() for s in element.itertext())
+
+
+def _text_collapsed(element):
+    """Join stripped text segments with spaces
+    (BeautifulSoup get_text(separator=' ', strip=True))"""
+    return ' '.join(s.strip() for s in element.itertext() if s.strip())
+
 
 def normalize_species_name(name, has_hybrid_marker=False):
     """Normalize species name, handling (x) hybrid markers"""
@@ -28,7 +125,9 @@ def normalize_species_name(name, has_hybrid_marker=False):
 
 def parse_species_list(html, base_url):
     """Parse the main list page to build synonym map and species list"""
-    soup = BeautifulSoup(html, 'html.parser')
+    # Work on the lxml tree directly; XPath/iteration run in C without
+    # BeautifulSoup's per-node Python wrappers
+    tree = lxml.html.fromstring(html)
 
     # Data structures to build
     synonym_map = {}  # Maps synonym -> accepted name
@@ -36,21 +135,18 @@ def parse_species_list(html, base_url):
 
     print("\nParsing species list...")
 
-    # Get all text content and split into lines
-    body_text = soup.get_text()
-    lines = [line.strip() for line in body_text.split('\n') if line.strip()]
 
     # Parse the HTML to find accepted species (marked with font size="4")
     # These are the only names that should appear as species in the final output
     accepted_species_set = set()  # Set of names that are truly accepted species
     links_map = {}  # Maps species name -> URL (includes both accepted and synonym names with links)
 
-    for link in soup.find_all('a', href=True):
-        href = link.get('href', '')
+    for link in tree.iter('a'):
+        href = link.get('href', '') or ''
         if 'quercus' in href.lower() and '.htm' in href:
             # Check if this link has a font size="4" child (accepted species marker)
-            has_font_4 = link.find('font', size="4") is not None
-            text = link.get_text(strip=True)
+            has_font_4 = link.find('.//font[@size="4"]') is not None
+            text = _text_joined(link)
 
             if text:
                 # Check if this is marked as a hybrid
@@ -58,6 +154,11 @@ def parse_species_list(html, base_url):
 
                 # Remove "Quercus " prefix and (x) marker for mapping
                 clean_name = text.replace('Quercus ', '').replace('(x)', '').replace('×', '').strip().split()[0]  # Take first word only
+                # Intern the name and its lowered form: these same
+                # strings are probed against links_map / the accepted
+                # set for every list line, and interned keys compare by
+                # pointer on the dict fast path
+                clean_name = sys.intern(clean_name)
 
                 links_map[clean_name] = {
                     'url': urljoin(base_url, href),
@@ -66,36 +167,38 @@ def parse_species_list(html, base_url):
 
                 # If this has font size="4", it's an accepted species
                 if has_font_4:
-                    accepted_species_set.add(clean_name.lower())
+                    accepted_species_set.add(sys.intern(clean_name.lower()))
 
     print(f"Found {len(links_map)} linked names")
     print(f"Found {len(accepted_species_set)} accepted species (with font size=4)")
 
-    # Now parse the text content line by line
-    i = 0
-    while i < len(lines):
-        line = lines[i]
+    # Now parse the text content line by line, streamed straight off
+    # the tree instead of via one giant text_content() string
+    for line in _iter_text_lines(tree):
+        # Classify the line with one lowered copy and single scans
+        # instead of re-lowering per predicate
+        line_lower = line.lower()
 
         # Skip headers and navigation
-        if any(skip in line.lower() for skip in ['list of species', 'accepted names', 'warning', 'names of hybrids']):
-            i += 1
+        if _SKIP_LINE_RE.search(line_lower):
             continue
 
         # Skip single letter navigation (A, B, C, etc.)
         if len(line) <= 3 and line.upper() == line:
-            i += 1
             continue
 
-        # Check if line contains (x) marker
-        has_hybrid_marker = '(x)' in line
-        line_no_marker = line.replace('(x)', '').strip()
+        # Tokenize and flag the line once; every branch below reads
+        # from the classification instead of rescanning
+        info = _classify_line(line, line_lower)
+        has_hybrid_marker = info.has_hybrid_marker
+        line_no_marker = info.text
 
         # Case 1: synonym = accepted (e.g., "aaata = corrugata")
-        if '=' in line_no_marker:
+        if info.has_eq:
             parts = line_no_marker.split('=')
             if len(parts) == 2:
-                synonym = parts[0].strip()
-                accepted = parts[1].strip()
+                synonym = sys.intern(parts[0].strip())
+                accepted = sys.intern(parts[1].strip())
 
                 # Check if the accepted name's link points to a different species name
                 # This indicates the accepted name is itself a synonym (synonym chain)
@@ -103,7 +206,7 @@ def parse_species_list(html, base_url):
                     accepted_url = links_map[accepted]['url']
                     # Extract species name from the URL
                     # URL format: .../quercus_SPECIES.htm
-                    url_match = re.search(r'quercus_(\w+)\.htm', accepted_url)
+                    url_match = _URL_SPECIES_RE.search(accepted_url)
                     species_from_url = url_match.group(1) if url_match else None
 
                     if species_from_url and species_from_url.lower() != accepted.lower():
@@ -128,23 +231,23 @@ def parse_species_list(html, base_url):
                     species_info[accepted] = {
                         'url': link_info.get('url'),
                         'author': None,
-                        'is_hybrid': link_info.get('is_hybrid', False) or '×' in accepted or ' x ' in accepted,
+                        'is_hybrid': link_info.get('is_hybrid', False) or _is_hybrid_name(accepted),
                         'synonyms': []
                     }
 
                 species_info[accepted]['synonyms'].append(synonym)
 
         # Case 2: "name1, name2 : see accepted" (e.g., "margaretta, margarettiae : see stellata")
-        elif ': see ' in line_no_marker.lower() or ':see ' in line_no_marker.lower():
-            parts = re.split(r':\s*see\s+', line_no_marker, flags=re.IGNORECASE)
+        elif info.has_see:
+            parts = _SEE_RE.split(line_no_marker)
             if len(parts) == 2:
                 synonyms_part = parts[0].strip()
-                accepted = parts[1].strip()
+                accepted = sys.intern(parts[1].strip())
 
                 # Check if the accepted name is itself a synonym (synonym chain)
                 if accepted in links_map:
                     accepted_url = links_map[accepted]['url']
-                    url_match = re.search(r'quercus_(\w+)\.htm', accepted_url)
+                    url_match = _URL_SPECIES_RE.search(accepted_url)
                     species_from_url = url_match.group(1) if url_match else None
 
                     if species_from_url and species_from_url.lower() != accepted.lower():
@@ -153,7 +256,7 @@ def parse_species_list(html, base_url):
                         synonym_map[accepted] = species_from_url
 
                 # Split multiple synonyms by comma
-                synonyms = [s.strip() for s in synonyms_part.split(',')]
+                synonyms = [sys.intern(s.strip()) for s in synonyms_part.split(',')]
 
                 for synonym in synonyms:
                     if synonym:
@@ -164,19 +267,19 @@ def parse_species_list(html, base_url):
                             species_info[accepted] = {
                                 'url': link_info.get('url'),
                                 'author': None,
-                                'is_hybrid': link_info.get('is_hybrid', False) or '×' in accepted or ' x ' in accepted,
+                                'is_hybrid': link_info.get('is_hybrid', False) or _is_hybrid_name(accepted),
                                 'synonyms': []
                             }
 
                         species_info[accepted]['synonyms'].append(synonym)
 
         # Case 3: "name (x) Author" or "name Author" (accepted name with optional hybrid marker and author)
-        elif line_no_marker and not any(c in line_no_marker for c in '=:'):
+        elif line_no_marker and not info.has_colon:
             # This could be a species name
             # Check if it's in our links_map
-            name_parts = line_no_marker.split()
+            name_parts = info.tokens
             if name_parts:
-                species_name = name_parts[0]
+                species_name = sys.intern(name_parts[0])
 
                 if species_name in links_map:
                     # This is an accepted species
@@ -184,7 +287,7 @@ def parse_species_list(html, base_url):
                     link_info = links_map[species_name]
 
                     # Use (x) marker from the line, not just from the link
-                    is_hybrid = has_hybrid_marker or link_info.get('is_hybrid', False) or '×' in species_name or ' x ' in species_name
+                    is_hybrid = has_hybrid_marker or link_info.get('is_hybrid', False) or _is_hybrid_name(species_name)
 
                     if species_name not in species_info:
                         species_info[species_name] = {
@@ -200,40 +303,40 @@ def parse_species_list(html, base_url):
                         if is_hybrid:
                             species_info[species_name]['is_hybrid'] = True
 
-        i += 1
-
     # Resolve synonym chains: if a synonym points to another synonym, resolve to the final name
-    def resolve_synonym(name, synonym_map, visited=None):
+    def resolve_synonym(name, synonym_map):
         """Resolve a synonym chain to the final accepted name"""
-        if visited is None:
-            visited = set()
-        if name in visited:
-            # Circular reference, return as-is
-            return name
-        if name not in synonym_map:
-            # This is the final accepted name
-            return name
-        visited.add(name)
-        return resolve_synonym(synonym_map[name], synonym_map, visited)
+        visited = set()
+        while name in synonym_map and name not in visited:
+            visited.add(name)
+            name = synonym_map[name]
+        # Either the final accepted name, or the point where a circular
+        # chain closed (returned as-is, matching the old behavior)
+        return name
+
+    # Resolve every synonym chain once and invert the map, so the
+    # species loop below is a direct lookup instead of rescanning all
+    # synonyms per species
+    synonyms_by_final = {}
+    for syn in synonym_map:
+        final_name = resolve_synonym(syn, synonym_map)
+        synonyms_by_final.setdefault(final_name.lower(), []).append(syn)
 
     # Build final species list (only accepted names with URLs)
     species_list = []
     for name, info in species_info.items():
+        # Lowercase once per entry; both the accepted check and the
+        # chain lookup below use the same key
+        name_lower = name.lower()
         if info['url']:  # Only include if we have a URL
             # Only include if this name is in the accepted_species_set
             # (marked with font size="4" in the source HTML)
-            if name.lower() in accepted_species_set:
-                # Collect all synonyms, including those that pointed to intermediate names
-                all_synonyms = []
-
-                # Direct synonyms
-                all_synonyms.extend(info['synonyms'])
-
-                # Find synonyms that resolve to this name through chains
-                for syn, accepted in synonym_map.items():
-                    final_name = resolve_synonym(syn, synonym_map)
-                    if final_name.lower() == name.lower() and syn not in all_synonyms:
-                        all_synonyms.append(syn)
+            if name_lower in accepted_species_set:
+                # Collect all synonyms, including those that pointed to
+                # intermediate names; a set dedupes direct and chained
+                # synonyms in one shot (output is sorted below anyway)
+                all_synonyms = set(info['synonyms'])
+                all_synonyms.update(synonyms_by_final.get(name_lower, []))
 
                 # Normalize the name (add × for hybrids)
                 full_name = normalize_species_name(f"Quercus {name}", info['is_hybrid'])
@@ -243,7 +346,7 @@ def parse_species_list(html, base_url):
                     'url': info['url'],
                     'is_hybrid': info['is_hybrid'],
                     'author': info['author'],
-                    'synonyms': [f"Quercus {syn}" for syn in sorted(set(all_synonyms))]
+                    'synonyms': [f"Quercus {syn}" for syn in sorted(all_synonyms)]
                 })
 
     # Also add the synonym map to help during processing
@@ -255,27 +358,22 @@ def parse_species_list(html, base_url):
     return species_list, synonym_map
 
 
-def extract_table_data(soup):
+def extract_table_data(tree):
     """Extract data from the species page table"""
     data = {}
 
-    # Find the main table
-    tables = soup.find_all('table')
-    if not tables:
-        return data
-
     # The data is in a table with rows containing labels and values
-    for table in tables:
-        rows = table.find_all('tr')
-        for row in rows:
-            cells = row.find_all('td')
-            if len(cells) >= 2:
-                label = cells[0].get_text(strip=True).lower()
-                # Use separator to preserve spaces between elements
-                value = cells[1].get_text(separator=' ', strip=True)
-
-                if value and value != '---':
-                    data[label] = value
+    for row in tree.iter('tr'):
+        cells = row.findall('td')
+        if len(cells) >= 2:
+            label = _text_joined(cells[0]).lower()
+            if label in _LABELS:
+                label = sys.intern(label)
+            # Collapse to single spaces between elements
+            value = _text_collapsed(cells[1])
+
+            if value and value != '---':
+                data[label] = value
 
     return data
 
@@ -288,10 +386,10 @@ def parse_taxonomy(misc_text):
         return None
 
     # Look for patterns like "Sub-genus Quercus, Section Quercus, Series Albae"
-    subgenus_match = re.search(r'Sub-genus\s+(\w+)', misc_text, re.IGNORECASE)
-    section_match = re.search(r'Section\s+(\w+)', misc_text, re.IGNORECASE)
-    series_match = re.search(r'Series\s+(\w+)', misc_text, re.IGNORECASE)
-    subsection_match = re.search(r'subsection\s+(\w+)', misc_text, re.IGNORECASE)
+    subgenus_match = _SUBGENUS_RE.search(misc_text)
+    section_match = _SECTION_RE.search(misc_text)
+    series_match = _SERIES_RE.search(misc_text)
+    subsection_match = _SUBSECTION_RE.search(misc_text)
 
     if subgenus_match:
         taxonomy['subgenus'] = subgenus_match.group(1)
@@ -311,7 +409,7 @@ def parse_conservation_status(misc_text):
         return None
 
     # Look for IUCN categories
-    match = re.search(r'IUCN.*?:\s*([A-Z]{2})', misc_text, re.IGNORECASE)
+    match = _IUCN_RE.search(misc_text)
     if match:
         return match.group(1)
 
@@ -334,22 +432,19 @@ def parse_hybrid_parents(synonym_text, species_name):
         return None, None, None
 
     # Look for pattern: "species1 x species2" or "species1 X species2"
-    # Prefer matches near the end of the text (more likely to be correct)
+    # The formula sits at the end of the synonym text, so scan only the
+    # tail and keep the last match without materializing the rest
     # Species names must be alphabetic and at least 3 chars
-    pattern = r'([a-zA-Z]{3,})\s*[xX×]\s*([a-zA-Z]{3,})'
+    match = None
+    for match in _HYBRID_FORMULA_RE.finditer(synonym_text[-200:]):
+        pass
 
-    # Find all matches and use the last one (most likely the actual hybrid formula)
-    matches = list(re.finditer(pattern, synonym_text))
-
-    if matches:
-        # Use the last match (usually the actual formula at end of text)
-        match = matches[-1]
+    if match:
         parent1_name = match.group(1).lower()
         parent2_name = match.group(2).lower()
 
         # Additional validation: reject common non-species words
-        invalid_words = {'var', 'subsp', 'nom', 'non', 'nec', 'illeg', 'inval'}
-        if parent1_name in invalid_words or parent2_name in invalid_words:
+        if parent1_name in _INVALID_PARENT_WORDS or parent2_name in _INVALID_PARENT_WORDS:
             return None, None, None
 
         parent1 = f"Quercus {parent1_name}"
@@ -365,15 +460,15 @@ def split_list_field(text):
         return []
 
     # Split by semicolon or comma
-    items = re.split(r'[;,]', text)
+    items = _SPLIT_LIST_RE.split(text)
     items = [item.strip() for item in items if item.strip()]
     return items if items else []
 
 
 def parse_species_page(html, species_name, is_hybrid, stored_author=None, stored_synonyms=None):
     """Parse individual species page"""
-    soup = BeautifulSoup(html, 'html.parser')
-    table_data = extract_table_data(soup)
+    tree = lxml.html.fromstring(html)
+    table_data = extract_table_data(tree)
 
     species_data = {
         'name': species_name,
@@ -421,6 +516,13 @@ def parse_species_page(html, species_name, is_hybrid, stored_author=None, stored
     return cleaned_data
 
 
+def _strip_quercus(name):
+    """Drop a leading 'Quercus ' genus prefix (any case) by slicing"""
+    if name[:7].lower() == 'quercus' and name[7:8].isspace():
+        return name[7:].strip()
+    return name.strip()
+
+
 def build_hybrid_relationships(species_list):
     """Build bidirectional relationships between species and their hybrids"""
     # Create lookup dictionaries
@@ -434,7 +536,7 @@ def build_hybrid_relationships(species_list):
 
             # Extract species name from "Quercus alba" format
             if parent1:
-                parent1_name = re.sub(r'^Quercus\s+', '', parent1, flags=re.IGNORECASE).strip()
+                parent1_name = _strip_quercus(parent1)
                 if parent1_name in species_by_name:
                     if 'hybrids' not in species_by_name[parent1_name]:
                         species_by_name[parent1_name]['hybrids'] = []
@@ -442,7 +544,7 @@ def build_hybrid_relationships(species_list):
                         species_by_name[parent1_name]['hybrids'].append(species['name'])
 
             if parent2:
-                parent2_name = re.sub(r'^Quercus\s+', '', parent2, flags=re.IGNORECASE).strip()
+                parent2_name = _strip_quercus(parent2)
                 if parent2_name in species_by_name:
                     if 'hybrids' not in species_by_name[parent2_name]:
                         species_by_name[parent2_name]['hybrids'] = []
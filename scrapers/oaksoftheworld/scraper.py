@@ -6,14 +6,17 @@ Extracts all Quercus species and hybrid data into JSON format
 
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from urllib.parse import urljoin
 
 # Import utility functions
 from name_parser import parse_species_list_html
 from utils import (
     fetch_page,
+    make_session,
     load_progress,
     save_progress,
+    append_species_data,
     save_final_output,
     clear_progress,
     get_cache_count,
@@ -41,6 +44,8 @@ def main():
     no_cache = '--no-cache' in sys.argv
     limit = None
 
+    parse_workers = 1
+
     # Check for --limit=N argument
     for arg in sys.argv:
         if arg.startswith('--limit='):
@@ -49,6 +54,12 @@ def main():
                 print(f"Limit mode: Processing only {limit} species")
             except ValueError:
                 print("Invalid limit value, ignoring")
+        elif arg.startswith('--parse-workers='):
+            try:
+                parse_workers = int(arg.split('=')[1])
+                print(f"Parsing species list with {parse_workers} workers")
+            except ValueError:
+                print("Invalid parse-workers value, ignoring")
 
     # If --test flag is used, default to 50 species
     if test_mode and limit is None:
@@ -77,15 +88,19 @@ def main():
     else:
         progress = load_progress()
     
+    # Single session with keep-alive; every page comes from the same host
+    session = make_session()
+
     # Fetch species list if we don't have it yet
     if not progress['species_links']:
         print("Fetching species list...")
-        list_html = fetch_page(LIST_URL, use_cache=use_cache)
+        list_html = fetch_page(LIST_URL, use_cache=use_cache, session=session)
         if not list_html:
             print("Failed to fetch species list")
             return
         
-        species_list, synonym_map = parse_species_list_html(list_html, BASE_URL)
+        species_list, synonym_map = parse_species_list_html(
+            list_html, BASE_URL, workers=parse_workers)
         # species_list, synonym_map = parse_species_list(list_html, BASE_URL)
         progress['species_links'] = species_list
         progress['synonym_map'] = synonym_map
@@ -123,47 +138,60 @@ def main():
                 progress['failed'] = []
                 remaining = [item for item in species_links if item['url'] not in completed]
     
-    # Process remaining species
-    for i, item in enumerate(remaining, 1):
-        # Skip if previously failed (unless we're retrying)
-        if item['url'] in failed_urls:
-            continue
-        
-        current_num = len(completed) + i
-        print(f"\nProcessing {current_num}/{total}: {item['name']}")
-        
-        try:
-            page_html = fetch_page(item['url'], use_cache=use_cache)
-            if not page_html:
-                print(f"  Failed to fetch page")
+    # Process remaining species. Fetches are embarrassingly parallel
+    # I/O, so overlap them in a small thread pool; parsing and all
+    # progress mutation stay on this thread, so saves never race.
+    # Previously failed URLs are skipped at submission (unless retrying).
+    to_fetch = [item for item in remaining if item['url'] not in failed_urls]
+    processed = 0
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        # Species pages go straight to lxml, which parses raw bytes and
+        # honors the page's declared encoding, so skip the text decode
+        futures = {
+            executor.submit(fetch_page, item['url'], use_cache=use_cache,
+                            session=session, binary=True): item
+            for item in to_fetch
+        }
+        for future in as_completed(futures):
+            item = futures[future]
+            processed += 1
+            current_num = len(completed) + processed
+            print(f"\nProcessing {current_num}/{total}: {item['name']}")
+
+            try:
+                page_html = future.result()
+                if not page_html:
+                    print(f"  Failed to fetch page")
+                    progress['failed'].append(item['url'])
+                    save_progress(progress)
+                    continue
+
+                species_data = parse_species_page(
+                    page_html,
+                    item['name'],
+                    item['is_hybrid'],
+                    stored_author=item.get('author'),
+                    stored_synonyms=item.get('synonyms', [])
+                )
+                species_data['url'] = item['url']
+
+                # Add to progress; the species itself goes straight to
+                # the append-only log so it is never rewritten
+                progress['species_data'].append(species_data)
+                progress['completed'].append(item['url'])
+                append_species_data(species_data)
+
+                # Save progress every 10 species
+                if len(progress['completed']) % 10 == 0:
+                    save_progress(progress)
+                    print(f"  Progress saved ({len(progress['completed'])}/{total})")
+
+            except Exception as e:
+                print(f"  Error processing {item['name']}: {e}")
                 progress['failed'].append(item['url'])
                 save_progress(progress)
                 continue
-            
-            species_data = parse_species_page(
-                page_html, 
-                item['name'], 
-                item['is_hybrid'],
-                stored_author=item.get('author'),
-                stored_synonyms=item.get('synonyms', [])
-            )
-            species_data['url'] = item['url']
-            
-            # Add to progress
-            progress['species_data'].append(species_data)
-            progress['completed'].append(item['url'])
-            
-            # Save progress every 10 species
-            if len(progress['completed']) % 10 == 0:
-                save_progress(progress)
-                print(f"  Progress saved ({len(progress['completed'])}/{total})")
-            
-        except Exception as e:
-            print(f"  Error processing {item['name']}: {e}")
-            progress['failed'].append(item['url'])
-            save_progress(progress)
-            continue
-    
+
     # Final save
     save_progress(progress)
     
@@ -196,6 +224,7 @@ def main():
     print(f"  python {sys.argv[0]} --test          # Process only first 50 species")
     print(f"  python {sys.argv[0]} --limit=N       # Process only first N species")
     print(f"  python {sys.argv[0]} --no-cache      # Ignore cache, fetch fresh data")
+    print(f"  python {sys.argv[0]} --parse-workers=N # Parse the species list with N processes")
     print(f"  python {sys.argv[0]} --no-ssl-verify # Disable SSL certificate verification")
     print(f"\nCache directory: {CACHE_DIR}/ ({get_cache_count()} files)")
     print(f"  To clear cache: rm -rf {CACHE_DIR}/")
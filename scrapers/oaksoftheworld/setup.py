@@ -29,6 +29,8 @@ setup(
     install_requires=[
         "requests>=2.31.0",
         "beautifulsoup4>=4.12.0",
+        "lxml>=5",
+        "orjson>=3",
     ],
     entry_points={
         "console_scripts": [
@@ -4,38 +4,73 @@ Utility functions for the Quercus scraper
 Handles caching, file I/O, progress tracking, and HTTP requests
 """
 
+import atexit
 import os
 import json
+import threading
 import time
 import hashlib
+import certifi
 import requests
 from pathlib import Path
-from urllib.parse import urlparse
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # Configuration - use project-root-relative paths
 PROJECT_ROOT = Path(__file__).parent.parent.parent
 TMP_SCRAPER_DIR = PROJECT_ROOT / "tmp" / "scraper"
 
 CACHE_DIR = str(TMP_SCRAPER_DIR / "html_cache")
+# Legacy single-file progress from older runs (read once for migration)
 PROGRESS_FILE = str(TMP_SCRAPER_DIR / "scraper_progress.json")
+# Progress is split: small metadata dict rewritten on interval, plus an
+# append-only JSONL log of scraped species so saves stay O(1) per
+# species instead of rewriting the whole growing dict
+PROGRESS_META_FILE = str(TMP_SCRAPER_DIR / "progress_meta.json")
+SPECIES_DATA_FILE = str(TMP_SCRAPER_DIR / "species_data.jsonl")
 OUTPUT_FILE = str(TMP_SCRAPER_DIR / "oaksoftheworld.json")
 INCONSISTENCY_LOG = str(TMP_SCRAPER_DIR / "data_inconsistencies.log")
 DELAY_SECONDS = 0.25
 
+# Rate limiting shared across fetch threads: with the scraper fanning
+# fetches out over a pool, per-thread sleeps would multiply the request
+# rate by the worker count; a shared timestamp keeps it at one request
+# per DELAY_SECONDS overall. Cache hits never touch the limiter.
+_rate_lock = threading.Lock()
+_last_request_ts = 0.0
+
+
+def _rate_limit_wait():
+    """Block until DELAY_SECONDS has elapsed since the last request."""
+    global _last_request_ts
+    with _rate_lock:
+        remaining = DELAY_SECONDS - (time.monotonic() - _last_request_ts)
+        if remaining > 0:
+            time.sleep(remaining)
+        _last_request_ts = time.monotonic()
+
+
+# Created once at import so the per-URL path helper skips the stat call
+os.makedirs(CACHE_DIR, exist_ok=True)
+
 
 def get_cache_path(url):
     """Generate a cache file path for a URL using a hash to prevent collisions"""
-    os.makedirs(CACHE_DIR, exist_ok=True)
-
     # Use SHA-256 hash of full URL to prevent path collisions
     # Different URLs with the same filename (e.g., /a/page.html vs /b/page.html)
     # will get different cache files
     url_hash = hashlib.sha256(url.encode('utf-8')).hexdigest()[:16]
 
-    # Keep original filename for readability, but prefix with hash
-    parsed = urlparse(url)
-    filename = parsed.path.split('/')[-1]
-    if not filename or filename == '':
+    # Keep original filename for readability, but prefix with hash.
+    # Slicing after the last '/' (and dropping any query/fragment)
+    # replaces a full urlparse per call
+    filename = url.rsplit('/', 1)[-1].split('?', 1)[0].split('#', 1)[0]
+    if not filename:
         filename = 'index.html'
 
     # Format: <hash>_<original_filename>
@@ -43,34 +78,78 @@ def get_cache_path(url):
     return os.path.join(CACHE_DIR, safe_filename)
 
 
-def fetch_page(url, use_cache=True):
+def make_session():
+    """Create a requests session with keep-alive to the scrape target
+
+    All requests go to the single host oaksoftheworld.fr, so a small
+    persistent pool amortizes TLS handshakes across the whole run.
+    Transient server errors retry with backoff, and the server is
+    invited to compress HTML on the wire.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=4,
+        max_retries=Retry(total=3, backoff_factor=0.5,
+                          status_forcelist=[429, 500, 502, 503, 504]),
+    )
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers['Accept-Encoding'] = 'gzip, deflate, br'
+    # Pin the CA bundle once; verification stays on for every request
+    # without resolving the bundle path per call
+    session.verify = certifi.where()
+    return session
+
+
+# Shared default session for callers that don't manage their own
+_SESSION = None
+
+
+def _default_session():
+    global _SESSION
+    if _SESSION is None:
+        _SESSION = make_session()
+    return _SESSION
+
+
+def fetch_page(url, use_cache=True, session=None, binary=False):
     """Fetch a page with error handling, rate limiting, and caching
 
     Args:
         url: The URL to fetch
         use_cache: Whether to use cached version if available
+        session: Optional requests.Session for connection reuse
+        binary: Return raw bytes instead of decoded text. Skips the
+            decode/re-encode round trip for pages handed straight to
+            lxml, which reads the page's own declared encoding.
     """
     cache_path = get_cache_path(url)
+    if binary:
+        read_mode, write_mode, encoding = 'rb', 'wb', None
+    else:
+        read_mode, write_mode, encoding = 'r', 'w', 'utf-8'
 
     # Check cache first
     if use_cache and os.path.exists(cache_path):
         try:
-            with open(cache_path, 'r', encoding='utf-8') as f:
+            with open(cache_path, read_mode, encoding=encoding) as f:
                 print(f"  [CACHE] Using cached version")
                 return f.read()
         except Exception as e:
             print(f"  [CACHE] Error reading cache: {e}, fetching fresh")
 
-    # Fetch from web (always verify SSL for security)
+    # Fetch from web (SSL verification is the session default)
     try:
-        time.sleep(DELAY_SECONDS)
-        response = requests.get(url, timeout=10, verify=True)
+        _rate_limit_wait()
+        client = session if session is not None else _default_session()
+        response = client.get(url, timeout=10)
         response.raise_for_status()
-        html = response.text
+        html = response.content if binary else response.text
 
         # Save to cache
         try:
-            with open(cache_path, 'w', encoding='utf-8') as f:
+            with open(cache_path, write_mode, encoding=encoding) as f:
                 f.write(html)
         except Exception as e:
             print(f"  [CACHE] Warning: Could not save to cache: {e}")
@@ -86,17 +165,13 @@ def fetch_page(url, use_cache=True):
 
 
 def load_progress():
-    """Load progress from previous run"""
-    if os.path.exists(PROGRESS_FILE):
-        try:
-            with open(PROGRESS_FILE, 'r', encoding='utf-8') as f:
-                progress = json.load(f)
-                print(f"Loaded progress: {len(progress.get('completed', []))} species already processed")
-                return progress
-        except json.JSONDecodeError:
-            print("Warning: Progress file corrupted, starting fresh")
-    
-    return {
+    """Load progress from previous run
+
+    Reads the metadata file and rebuilds species_data from the
+    append-only JSONL log. Falls back to the legacy single-file format
+    for runs saved before the split.
+    """
+    progress = {
         'species_links': [],
         'synonym_map': {},
         'completed': [],
@@ -104,44 +179,131 @@ def load_progress():
         'species_data': []
     }
 
+    if os.path.exists(PROGRESS_META_FILE):
+        try:
+            with open(PROGRESS_META_FILE, 'r', encoding='utf-8') as f:
+                progress.update(json.load(f))
+        except json.JSONDecodeError:
+            print("Warning: Progress file corrupted, starting fresh")
+            return progress
+
+        if os.path.exists(SPECIES_DATA_FILE):
+            with open(SPECIES_DATA_FILE, 'r', encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if line:
+                        progress['species_data'].append(json.loads(line))
+
+        print(f"Loaded progress: {len(progress['completed'])} species already processed")
+        return progress
+
+    # Legacy format: everything in one dict
+    if os.path.exists(PROGRESS_FILE):
+        try:
+            with open(PROGRESS_FILE, 'r', encoding='utf-8') as f:
+                legacy = json.load(f)
+                progress.update(legacy)
+                print(f"Loaded progress: {len(progress['completed'])} species already processed")
+                # Re-save in the split format; completed species go to
+                # the JSONL log so they are never rewritten again
+                for species_data in progress['species_data']:
+                    append_species_data(species_data)
+                save_progress(progress)
+                os.remove(PROGRESS_FILE)
+                return progress
+        except json.JSONDecodeError:
+            print("Warning: Progress file corrupted, starting fresh")
+
+    return progress
+
 
 def save_progress(progress):
-    """Save current progress to disk"""
-    with open(PROGRESS_FILE, 'w', encoding='utf-8') as f:
-        json.dump(progress, f, indent=2, ensure_ascii=False)
+    """Save progress metadata to disk (everything except species_data)
+
+    Scraped species are appended to the JSONL log as they complete via
+    append_species_data, so the interval save only rewrites the small
+    metadata dict.
+    """
+    meta = {key: progress[key]
+            for key in ('species_links', 'synonym_map', 'completed', 'failed')}
+    _dump_json(meta, PROGRESS_META_FILE)
+
+
+def append_species_data(species_data):
+    """Append one scraped species to the JSONL progress log"""
+    with open(SPECIES_DATA_FILE, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(species_data, ensure_ascii=False) + '\n')
+
+
+def _dump_json(obj, path):
+    """Write an indented JSON file (orjson keeps the encode in C when available)
+
+    Both paths encode the whole document first and hand the file one
+    large write, instead of json.dump's token-at-a-time writes through
+    the default 8 KB buffer.
+    """
+    if orjson is not None:
+        with open(path, 'wb') as f:
+            f.write(orjson.dumps(obj, option=orjson.OPT_INDENT_2))
+    else:
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(obj, indent=2, ensure_ascii=False))
 
 
 def save_final_output(all_species):
     """Save final JSON output"""
-    with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
-        json.dump({'species': all_species}, f, indent=2, ensure_ascii=False)
+    _dump_json({'species': all_species}, OUTPUT_FILE)
+
+
+# Inconsistency log handle, opened once in append mode. Per-call
+# open/write/close cost three syscalls per note; the buffered handle
+# amortizes them and is flushed at exit (and before counting).
+_LOG_FH = None
+
+
+def _log_handle():
+    global _LOG_FH
+    if _LOG_FH is None:
+        _LOG_FH = open(INCONSISTENCY_LOG, 'a', buffering=65536, encoding='utf-8')
+        atexit.register(_LOG_FH.close)
+    return _LOG_FH
 
 
 def log_inconsistency(message):
     """Log taxonomic notes and synonym chains to a file"""
-    with open(INCONSISTENCY_LOG, 'a', encoding='utf-8') as f:
-        f.write(f"{message}\n")
+    _log_handle().write(f"{message}\n")
     print(f"  [TAXONOMIC NOTE] {message}")
 
 
 def clear_progress():
     """Clear all progress and cache files"""
-    if os.path.exists(PROGRESS_FILE):
-        os.remove(PROGRESS_FILE)
-    if os.path.exists(INCONSISTENCY_LOG):
-        os.remove(INCONSISTENCY_LOG)
+    global _LOG_FH
+    if _LOG_FH is not None:
+        _LOG_FH.close()
+        _LOG_FH = None
+    for path in (PROGRESS_FILE, PROGRESS_META_FILE, SPECIES_DATA_FILE, INCONSISTENCY_LOG):
+        if os.path.exists(path):
+            os.remove(path)
 
 
 def get_cache_count():
     """Get number of cached HTML files"""
-    if not os.path.exists(CACHE_DIR):
+    try:
+        with os.scandir(CACHE_DIR) as entries:
+            return sum(1 for entry in entries if entry.name.endswith('.htm'))
+    except FileNotFoundError:
         return 0
-    return len([f for f in os.listdir(CACHE_DIR) if f.endswith('.htm')])
 
 
 def get_inconsistency_count():
     """Get number of logged inconsistencies"""
-    if not os.path.exists(INCONSISTENCY_LOG):
-        return 0
-    with open(INCONSISTENCY_LOG, 'r') as f:
-        return len(f.readlines())
\ No newline at end of file
+    # Make buffered notes visible before counting
+    if _LOG_FH is not None:
+        _LOG_FH.flush()
+    # Count newlines in raw 1 MB chunks; bytes.count runs in C and
+    # nothing gets decoded or split into per-line strings
+    try:
+        with open(INCONSISTENCY_LOG, 'rb') as f:
+            return sum(chunk.count(b'\n') for chunk in iter(lambda: f.read(1 << 20), b''))
+    except FileNotFoundError:
+        return 0
\ No newline at end of file
@@ -10,10 +10,13 @@ Usage:
 """
 
 import argparse
+import functools
 import json
 import re
 import sqlite3
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from urllib.request import Request, urlopen
 from urllib.error import HTTPError, URLError
@@ -22,18 +25,58 @@ from urllib.error import HTTPError, URLError
 API_URL = "https://plantsservices.sc.egov.usda.gov/api/PlantProfile"
 PLANTS_URL = "https://plants.usda.gov/plant-profile/"
 
-# Rate limiting
+# Strips the <i>...</i> markup around scientific names in API responses
+_TAG_RE = re.compile(r"<[^>]+>")
+
+# Rate limiting - shared across worker threads so the request rate to
+# the API stays the same no matter how many lookups run concurrently
 REQUEST_DELAY = 0.3  # seconds between requests
+_rate_lock = threading.Lock()
+_last_request_ts = 0.0
+
+
+def rate_limit_wait():
+    """Block until REQUEST_DELAY has elapsed since the last request."""
+    global _last_request_ts
+    with _rate_lock:
+        remaining = REQUEST_DELAY - (time.monotonic() - _last_request_ts)
+        if remaining > 0:
+            time.sleep(remaining)
+        _last_request_ts = time.monotonic()
 
 DB_PATH = Path(__file__).parent.parent / "cli" / "oak_compendium.db"
 
+# Names that returned no match on a previous run; lookups are idempotent
+# and expensive (up to 9 probes each), so persist the negative results
+NOTFOUND_CACHE = Path(__file__).parent.parent / "tmp" / "usda" / "notfound_cache.json"
+
+
+def load_notfound_cache() -> set[str]:
+    """Load the set of names previously confirmed to have no USDA symbol."""
+    try:
+        with open(NOTFOUND_CACHE, encoding="utf-8") as f:
+            return set(json.load(f))
+    except (FileNotFoundError, json.JSONDecodeError):
+        return set()
 
-def generate_candidate_symbols(species_name: str) -> list[str]:
+
+def save_notfound_cache(names: set[str]) -> None:
+    """Persist the not-found set for the next run."""
+    NOTFOUND_CACHE.parent.mkdir(parents=True, exist_ok=True)
+    with open(NOTFOUND_CACHE, "w", encoding="utf-8") as f:
+        json.dump(sorted(names), f, indent=2)
+
+
+@functools.lru_cache(maxsize=1024)
+def generate_candidate_symbols(species_name: str) -> tuple[str, ...]:
     """
     Generate candidate USDA symbols for a species.
 
     Pattern: QU + first 2 letters of epithet + optional numeric suffix
     For hybrids (starting with ×), use the hybrid name after ×
+
+    Memoized per name so re-runs and retries skip the string work; the
+    immutable tuple is safe to share between cache hits.
     """
     name = species_name.strip()
 
@@ -46,22 +89,20 @@ def generate_candidate_symbols(species_name: str) -> list[str]:
 
     # Get first 2 letters of the species epithet
     if len(name) < 2:
-        return []
+        return ()
 
     base = "QU" + name[:2].upper()
 
     # Generate candidates: QUXX, QUXX2, QUXX3, ... QUXX9
-    candidates = [base]
-    for i in range(2, 10):
-        candidates.append(f"{base}{i}")
-
-    return candidates
+    return (base,) + tuple(f"{base}{i}" for i in range(2, 10))
 
 
-def check_usda_symbol(symbol: str, expected_species: str) -> dict | None:
+def check_usda_symbol(symbol: str, expected_epithet: str) -> dict | None:
     """
     Check if a symbol exists in USDA and matches our species.
 
+    expected_epithet must already be lowercased with any leading ×
+    stripped (the caller normalizes once per species, not per probe).
     Returns the API response if valid, None otherwise.
     """
     url = f"{API_URL}?symbol={symbol}"
@@ -82,10 +123,9 @@ def check_usda_symbol(symbol: str, expected_species: str) -> dict | None:
             # Extract the species name from the scientific name
             # Format: "<i>Quercus alba</i> L." -> "alba"
             sci_name = data.get("ScientificName", "")
-            # Remove HTML tags
-            sci_name = re.sub(r"<[^>]+>", "", sci_name)
-            # Extract species epithet (second word, handling hybrids)
-            parts = sci_name.split()
+            # Remove HTML tags, then split out just the first two words
+            sci_name = _TAG_RE.sub("", sci_name)
+            parts = sci_name.split(None, 2)
 
             if len(parts) < 2:
                 return None
@@ -95,13 +135,8 @@ def check_usda_symbol(symbol: str, expected_species: str) -> dict | None:
             if epithet.startswith("×"):
                 epithet = epithet[1:]
 
-            # Normalize expected species for comparison
-            expected = expected_species.lower()
-            if expected.startswith("×"):
-                expected = expected[1:]
-
             # Check if it matches
-            if epithet == expected:
+            if epithet == expected_epithet:
                 return data
 
             return None
@@ -126,36 +161,35 @@ def find_usda_symbol(species_name: str) -> tuple[str | None, dict | None]:
     """
     candidates = generate_candidate_symbols(species_name)
 
+    # Normalize once; every candidate probe compares against the same
+    # expected epithet
+    expected = species_name.lower()
+    if expected.startswith("×"):
+        expected = expected[1:]
+
     for symbol in candidates:
-        time.sleep(REQUEST_DELAY)
-        result = check_usda_symbol(symbol, species_name)
+        rate_limit_wait()
+        result = check_usda_symbol(symbol, expected)
         if result:
             return symbol, result
 
     return None, None
 
 
-def update_external_links(conn: sqlite3.Connection, species_name: str,
-                          symbol: str, common_name: str | None, dry_run: bool) -> bool:
-    """
-    Add USDA link to the species' external_links field.
+def update_external_links(species_name: str, existing_json: str | None,
+                          symbol: str, common_name: str | None) -> str | None:
     """
-    cursor = conn.cursor()
-
-    # Get current external_links
-    cursor.execute(
-        "SELECT external_links FROM oak_entries WHERE scientific_name = ?",
-        (species_name,)
-    )
-    row = cursor.fetchone()
-    if not row:
-        return False
+    Build the updated external_links JSON with the USDA link appended.
 
+    existing_json is the already-loaded external_links value for the
+    species, so no query runs here. Returns the serialized links list,
+    or None if the species already has a USDA link. The caller batches
+    the actual UPDATEs into a single transaction at the end of the run.
+    """
     # Parse existing links
-    existing = row[0]
-    if existing:
+    if existing_json:
         try:
-            links = json.loads(existing)
+            links = json.loads(existing_json)
         except json.JSONDecodeError:
             links = []
     else:
@@ -164,7 +198,7 @@ def update_external_links(conn: sqlite3.Connection, species_name: str,
     # Check if USDA link already exists
     for link in links:
         if link.get("logo") == "usda" or link.get("source") == "USDA":
-            return False  # Already has USDA link
+            return None  # Already has USDA link
 
     # Add USDA link
     # Note: Go model uses "logo" as identifier, not "source"
@@ -175,15 +209,7 @@ def update_external_links(conn: sqlite3.Connection, species_name: str,
     }
 
     links.append(usda_link)
-
-    if not dry_run:
-        cursor.execute(
-            "UPDATE oak_entries SET external_links = ? WHERE scientific_name = ?",
-            (json.dumps(links), species_name)
-        )
-        conn.commit()
-
-    return True
+    return json.dumps(links)
 
 
 def main():
@@ -192,6 +218,8 @@ def main():
     parser.add_argument("--limit", type=int, help="Limit number of species to process")
     parser.add_argument("--skip-existing", action="store_true", default=True,
                         help="Skip species that already have USDA links")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Number of concurrent lookups (default: 1, serial)")
     args = parser.parse_args()
 
     if not DB_PATH.exists():
@@ -199,23 +227,40 @@ def main():
         return 1
 
     conn = sqlite3.connect(DB_PATH)
+    # One fsync for the whole run instead of one per row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
     cursor = conn.cursor()
 
-    # Get all species
-    cursor.execute("SELECT scientific_name, external_links FROM oak_entries ORDER BY scientific_name")
-    all_species = cursor.fetchall()
-
-    # Filter out species that already have USDA links if requested
-    species_to_process = []
-    for name, links_json in all_species:
-        if args.skip_existing and links_json:
-            try:
-                links = json.loads(links_json)
-                if any(l.get("source") == "USDA" for l in links):
-                    continue
-            except json.JSONDecodeError:
-                pass
-        species_to_process.append(name)
+    # Let SQLite's json_each filter out species that already have USDA
+    # links instead of loading and json.loads-ing every row in Python.
+    # Rows with NULL, empty, or malformed external_links are kept (same
+    # as the old JSONDecodeError fallthrough).
+    if args.skip_existing:
+        cursor.execute(
+            """SELECT scientific_name, external_links FROM oak_entries
+               WHERE external_links IS NULL
+                  OR NOT json_valid(external_links)
+                  OR NOT EXISTS (SELECT 1 FROM json_each(external_links)
+                                 WHERE json_extract(value, '$.source') = 'USDA')
+               ORDER BY scientific_name"""
+        )
+    else:
+        cursor.execute(
+            "SELECT scientific_name, external_links FROM oak_entries ORDER BY scientific_name"
+        )
+    rows = cursor.fetchall()
+    links_by_name = dict(rows)
+    species_to_process = [name for name, _ in rows]
+
+    # Skip names that already came back empty on a previous run
+    notfound_cache = load_notfound_cache()
+    cached_notfound = sum(1 for name in species_to_process if name in notfound_cache)
+    if cached_notfound:
+        species_to_process = [name for name in species_to_process
+                              if name not in notfound_cache]
+        print(f"Skipping {cached_notfound} species cached as not found "
+              f"(delete {NOTFOUND_CACHE} to retry them)")
 
     if args.limit:
         species_to_process = species_to_process[:args.limit]
@@ -228,28 +273,61 @@ def main():
     found = 0
     not_found = 0
     errors = 0
+    pending_updates = []  # (links_json, scientific_name) tuples
+
+    def lookup(name):
+        """Run one lookup, returning any exception instead of raising."""
+        try:
+            return find_usda_symbol(name), None
+        except Exception as e:
+            return (None, None), e
+
+    # Candidate probes for one species stay serial (the unsuffixed
+    # symbol usually hits first), but different species overlap their
+    # network latency across the worker pool; the shared rate limiter
+    # keeps the overall request rate polite. Database updates happen
+    # here on the main thread as results arrive in submission order.
+    if args.workers > 1:
+        executor = ThreadPoolExecutor(max_workers=args.workers)
+        results = executor.map(lookup, species_to_process)
+    else:
+        executor = None
+        results = map(lookup, species_to_process)
 
-    for i, species_name in enumerate(species_to_process):
+    for i, (species_name, ((symbol, data), error)) in enumerate(zip(species_to_process, results)):
         print(f"[{i+1}/{len(species_to_process)}] {species_name}...", end=" ", flush=True)
 
-        try:
-            symbol, data = find_usda_symbol(species_name)
-
-            if symbol:
-                common_name = data.get("CommonName") if data else None
-                updated = update_external_links(conn, species_name, symbol, common_name, args.dry_run)
-                if updated:
-                    print(f"-> {symbol}" + (f" ({common_name})" if common_name else ""))
-                    found += 1
-                else:
-                    print(f"-> {symbol} (already exists)")
+        if error is not None:
+            print(f"error: {error}")
+            errors += 1
+        elif symbol:
+            notfound_cache.discard(species_name)
+            common_name = data.get("CommonName") if data else None
+            links_json = update_external_links(species_name, links_by_name.get(species_name),
+                                               symbol, common_name)
+            if links_json:
+                pending_updates.append((links_json, species_name))
+                print(f"-> {symbol}" + (f" ({common_name})" if common_name else ""))
+                found += 1
             else:
-                print("not found")
-                not_found += 1
+                print(f"-> {symbol} (already exists)")
+        else:
+            print("not found")
+            notfound_cache.add(species_name)
+            not_found += 1
 
-        except Exception as e:
-            print(f"error: {e}")
-            errors += 1
+    if executor is not None:
+        executor.shutdown()
+
+    save_notfound_cache(notfound_cache)
+
+    # Flush all updates in one transaction
+    if pending_updates and not args.dry_run:
+        cursor.executemany(
+            "UPDATE oak_entries SET external_links = ? WHERE scientific_name = ?",
+            pending_updates
+        )
+        conn.commit()
 
     print()
     print(f"Summary: {found} found, {not_found} not found, {errors} errors")
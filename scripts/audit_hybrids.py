@@ -9,12 +9,27 @@ This script:
 3. Generates a report and a mapping file for fixing the data
 """
 
+import argparse
 import json
+import mmap
 import re
+import sys
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from itertools import groupby
 from difflib import SequenceMatcher
 from pathlib import Path
 
+try:
+    from rapidfuzz import fuzz, process
+except ImportError:
+    fuzz = process = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # Paths
 PROJECT_ROOT = Path(__file__).parent.parent
 HTML_CACHE = PROJECT_ROOT / "tmp" / "scraper" / "html_cache"
@@ -23,61 +38,74 @@ REPORT_OUTPUT = PROJECT_ROOT / "tmp" / "hybrid_audit_report.txt"
 MAPPING_OUTPUT = PROJECT_ROOT / "tmp" / "hybrid_name_mapping.json"
 
 
-def similarity(a: str, b: str) -> float:
-    """Calculate string similarity ratio."""
-    return SequenceMatcher(None, a.lower(), b.lower()).ratio()
 
 
-def parse_hybrids_from_html(html_content: str) -> dict:
+# Hybrid-section patterns, compiled once at module scope as bytes so
+# cached HTML files can be scanned straight off an mmap without
+# decoding whole pages; only the captured names get decoded
+# Pattern: --- and numerous hybrids = <links>
+_HYBRID_RE = re.compile(rb'---\s*and\s+(?:numerous\s+)?hybrids?\s*=\s*(.+?)(?:---|;|$)',
+                        re.IGNORECASE | re.DOTALL)
+# Link targets (href="quercus_NAME.htm")
+_LINK_RE = re.compile(rb'href="quercus_([^"]+)\.htm"', re.IGNORECASE)
+# Display text (x NAME pattern, possibly in italics):
+# x bebbiana, x <i>bebbiana</i>, etc.
+_TEXT_RE = re.compile(rb'x\s*(?:</?i>)?\s*([a-z]+)', re.IGNORECASE)
+_XPREFIX_RE = re.compile(r'^x_?')
+
+
+def parse_hybrids_from_html(html_content) -> dict:
     """
-    Parse hybrid references from HTML.
+    Parse hybrid references from HTML given as a bytes-like buffer
+    (an mmap or bytes object).
     Returns dict with 'link_names' and 'text_names' lists.
     """
     result = {'link_names': [], 'text_names': []}
 
-    # Find the hybrids section pattern
-    # Pattern: --- and numerous hybrids = <links>
-    hybrid_pattern = r'---\s*and\s+(?:numerous\s+)?hybrids?\s*=\s*(.+?)(?:---|;|$)'
-    match = re.search(hybrid_pattern, html_content, re.IGNORECASE | re.DOTALL)
-
+    match = _HYBRID_RE.search(html_content)
     if not match:
         return result
 
     hybrid_section = match.group(1)
 
-    # Extract link targets (href="quercus_NAME.htm")
-    link_pattern = r'href="quercus_([^"]+)\.htm"'
-    for m in re.finditer(link_pattern, hybrid_section, re.IGNORECASE):
-        name = m.group(1).strip()
+    for m in _LINK_RE.finditer(hybrid_section):
+        # The site serves Latin-1; only the short captures get decoded
+        name = m.group(1).decode('latin-1').strip()
         # Clean up: remove 'x_' prefix if present, handle underscores
-        name = re.sub(r'^x_?', '', name)
+        name = _XPREFIX_RE.sub('', name)
         name = name.replace('_', ' ')
         result['link_names'].append(name)
 
-    # Extract display text (x NAME pattern, possibly in italics)
-    # Matches: x bebbiana, x <i>bebbiana</i>, etc.
-    text_pattern = r'x\s*(?:</?i>)?\s*([a-z]+)'
-    for m in re.finditer(text_pattern, hybrid_section, re.IGNORECASE):
-        name = m.group(1).strip()
-        result['text_names'].append(name)
+    for m in _TEXT_RE.finditer(hybrid_section):
+        result['text_names'].append(m.group(1).decode('latin-1').strip())
 
     return result
 
 
 def load_db_hybrids() -> dict:
     """Load all hybrid species from the database export."""
-    with open(DB_EXPORT) as f:
-        data = json.load(f)
-
-    # Build lookup: name -> species object
-    # Also build a set of all hybrid names (with × prefix stripped)
-    all_species = {s['name']: s for s in data['species']}
-
+    # orjson decodes the multi-MB export in C when installed
+    with open(DB_EXPORT, 'rb') as f:
+        raw = f.read()
+    data = orjson.loads(raw) if orjson is not None else json.loads(raw)
+
+    # Single pass: build the name lookup and both hybrid-name sets
+    # (with and without the × prefix) as the species stream by.
+    # Only the fields the audit reads are kept per species; the full
+    # objects (descriptions, sources, ...) would dominate memory.
+    all_species = {}
     hybrid_names = set()
+    hybrid_names_original = set()
     for s in data['species']:
+        all_species[s['name']] = {
+            'hybrids': s.get('hybrids') or (),
+            'parent1': s.get('parent1'),
+            'parent2': s.get('parent2'),
+        }
         if s.get('is_hybrid'):
             # Normalize name: strip × prefix
             name = s['name']
+            hybrid_names_original.add(name)
             if name.startswith('× '):
                 name = name[2:]
             hybrid_names.add(name.lower())
@@ -85,26 +113,103 @@ def load_db_hybrids() -> dict:
     return {
         'all_species': all_species,
         'hybrid_names': hybrid_names,
-        'hybrid_names_original': {s['name'] for s in data['species'] if s.get('is_hybrid')}
+        'hybrid_names_original': hybrid_names_original,
     }
 
 
+# One SequenceMatcher per DB hybrid name, reused across queries.
+# Building the b2j index for seq2 is the expensive part of matcher
+# setup; set_seq1 swaps the query in while keeping that index (and the
+# quick_ratio character counts) cached.
+_matchers = {}
+
+
+def _candidate_matcher(h: str) -> SequenceMatcher:
+    sm = _matchers.get(h)
+    if sm is None:
+        sm = _matchers[h] = SequenceMatcher(None, '', h)
+    return sm
+
+
 def find_close_matches(name: str, hybrid_names: set, threshold: float = 0.7) -> list:
-    """Find hybrid names that are close matches to the given name."""
-    matches = []
-    name_lower = name.lower()
+    """Find hybrid names that are close matches to the given name.
+
+    Expects a pre-normalized (lowercased, × stripped) name — every
+    caller normalizes once at ingest, so nothing is re-lowered here.
+
+    Uses rapidfuzz's C++ scorer when installed (the all-pairs similarity
+    scan is the dominant cost of the audit); falls back to the pure-Python
+    SequenceMatcher otherwise. The scorers are close but not identical:
+    rapidfuzz computes exact normalized InDel similarity, while
+    SequenceMatcher's greedy Ratcliff/Obershelp matching can score the
+    same pair lower, so borderline candidates near the threshold may
+    classify differently depending on which backend is active. Acceptable
+    here: the output is a manually reviewed audit report, not data.
+    """
+    if process is not None:
+        return [(h, score / 100) for h, score, _ in
+                process.extract(name, hybrid_names, scorer=fuzz.ratio,
+                                score_cutoff=threshold * 100, limit=None)
+                if h != name]
 
+    matches = []
     for h in hybrid_names:
-        if h == name_lower:
+        if h == name:
             continue  # Skip exact matches
-        sim = similarity(name_lower, h)
+        # Length pre-check: ratio is bounded by 2*min(la,lb)/(la+lb),
+        # so a large length mismatch can never clear the threshold.
+        # Same bound as real_quick_ratio, but computed from plain
+        # lengths before the matcher is even touched.
+        la, lb = len(name), len(h)
+        if 2 * min(la, lb) < threshold * (la + lb):
+            continue
+        # quick_ratio (character multisets) is also a strict upper
+        # bound on ratio; rejecting on it skips the expensive
+        # matching-block computation without affecting which matches
+        # survive
+        sm = _candidate_matcher(h)
+        sm.set_seq1(name)
+        if sm.quick_ratio() < threshold:
+            continue
+        sim = sm.ratio()
         if sim >= threshold:
             matches.append((h, sim))
 
     return sorted(matches, key=lambda x: -x[1])
 
 
+def _scan_one(html_file: Path) -> list:
+    """Scan one cached HTML file for text/link hybrid mismatches.
+
+    Module-level so it pickles cleanly into the worker processes.
+    Returns the (species, text_name, link_name) tuples found.
+    """
+    species_name = html_file.stem.replace('quercus_', '')
+    mismatches = []
+    try:
+        # Scan the kernel page cache directly instead of reading and
+        # decoding each file into a fresh string
+        with open(html_file, 'rb') as f, \
+                mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            parsed = parse_hybrids_from_html(mm)
+    except Exception:
+        return mismatches
+
+    for i, link_name in enumerate(parsed['link_names']):
+        if i < len(parsed['text_names']):
+            text_name = parsed['text_names'][i]
+            if link_name.lower() != text_name.lower():
+                mismatches.append((species_name, text_name, link_name))
+    return mismatches
+
+
 def main():
+    parser = argparse.ArgumentParser(description="Audit hybrid naming between OOTW and the database")
+    parser.add_argument('--no-blocking', action='store_true',
+                        help="Compare every reference against every hybrid name "
+                             "instead of only prefix-bucket candidates")
+    args = parser.parse_args()
+
     print("Loading database...")
     db_data = load_db_hybrids()
     hybrid_names = db_data['hybrid_names']  # Set of normalized hybrid names (no × prefix)
@@ -113,6 +218,14 @@ def main():
 
     print(f"Found {len(hybrid_names)} hybrid species in database")
 
+    # Bucket candidates by their first two characters so each reference
+    # is only scored against names sharing (or transposing) its prefix.
+    # Epithet typos past the first two letters are by far the common
+    # case; use --no-blocking to validate against the full scan.
+    buckets = defaultdict(list)
+    for h in hybrid_names:
+        buckets[h[:2]].append(h)
+
     # Results tracking
     exact_matches = 0
     close_matches = []  # (species, ref_name, db_name, similarity)
@@ -124,46 +237,60 @@ def main():
                             if s.get('hybrids') and len(s['hybrids']) > 0]
     print(f"Found {len(species_with_hybrids)} species with hybrid references")
 
+    # Group occurrences by normalized reference first (strip × prefix);
+    # the same reference name recurs under many parent species, so each
+    # unique name is scored once and the result fanned back out
+    occurrences = defaultdict(list)  # ref_normalized -> [(species, ref_name)]
     for species_name, species in species_with_hybrids:
         for ref_name in species['hybrids']:
-            ref_lower = ref_name.lower()
+            ref_normalized = ref_name.lower().lstrip('× ').strip()
+            occurrences[ref_normalized].append((species_name, ref_name))
 
-            # Check for exact match (normalize: strip × prefix if present)
-            ref_normalized = ref_lower.lstrip('× ').strip()
+    for ref_normalized, occurrence_list in occurrences.items():
+        if ref_normalized in hybrid_names:
+            exact_matches += len(occurrence_list)
+            continue
 
-            if ref_normalized in hybrid_names:
-                exact_matches += 1
-            else:
-                # Try to find close matches
-                matches = find_close_matches(ref_normalized, hybrid_names)
-                if matches:
-                    best_match, sim = matches[0]
-                    close_matches.append((species_name, ref_name, best_match, sim))
-                    # Build mapping
-                    if ref_name not in name_mapping:
-                        name_mapping[ref_name] = best_match
-                else:
-                    no_matches.append((species_name, ref_name))
-
-    # Also check HTML for internal OOTW inconsistencies
+        # Try to find close matches among the prefix-bucket candidates
+        # (or everything with --no-blocking)
+        if args.no_blocking:
+            candidates = hybrid_names
+        else:
+            prefix = ref_normalized[:2]
+            candidates = buckets.get(prefix, []) + buckets.get(prefix[::-1], [])
+        matches = find_close_matches(ref_normalized, candidates)
+        if matches:
+            best_match, sim = matches[0]
+            for species_name, ref_name in occurrence_list:
+                close_matches.append((species_name, ref_name, best_match, sim))
+                # Build mapping
+                if ref_name not in name_mapping:
+                    name_mapping[ref_name] = best_match
+        else:
+            no_matches.extend(occurrence_list)
+
+    # Also check HTML for internal OOTW inconsistencies. The scan is
+    # pure regex work with no shared state, so spread the files across
+    # a process pool; results come back in file order.
     text_vs_link_mismatches = []
     html_files = list(HTML_CACHE.glob("*.htm"))
     print(f"Scanning {len(html_files)} HTML files for internal inconsistencies...")
 
-    for html_file in sorted(html_files):
-        species_name = html_file.stem.replace('quercus_', '')
-        try:
-            with open(html_file, 'r', encoding='utf-8', errors='ignore') as f:
-                html_content = f.read()
-        except Exception:
-            continue
-
-        parsed = parse_hybrids_from_html(html_content)
-        for i, link_name in enumerate(parsed['link_names']):
-            if i < len(parsed['text_names']):
-                text_name = parsed['text_names'][i]
-                if link_name.lower() != text_name.lower():
-                    text_vs_link_mismatches.append((species_name, text_name, link_name))
+    with ProcessPoolExecutor() as executor:
+        for mismatches in executor.map(_scan_one, sorted(html_files), chunksize=32):
+            text_vs_link_mismatches.extend(mismatches)
+
+    # Group the match lists once for both the report and the mapping
+    # file: sort and slice into runs with groupby instead of building a
+    # defaultdict of lists per consumer. Pair groups are ordered by
+    # descending similarity, name groups alphabetically.
+    close_matches.sort(key=lambda t: (-t[3], t[1], t[2]))
+    pair_groups = [(key, sorted({t[0] for t in group}))
+                   for key, group in groupby(close_matches,
+                                             key=lambda t: (t[1], t[2], t[3]))]
+    no_matches.sort(key=lambda t: (t[1], t[0]))
+    name_groups = [(key, sorted({t[0] for t in group}))
+                   for key, group in groupby(no_matches, key=lambda t: t[1])]
 
     # Generate report
     report_lines = []
@@ -203,12 +330,7 @@ def main():
         report_lines.append("  DB:   '× name' (parents from DB: parent1 × parent2)")
         report_lines.append("")
 
-        # Group by (OOTW name, DB name) pair
-        by_pair = defaultdict(list)
-        for species, ootw, db, sim in close_matches:
-            by_pair[(ootw, db, sim)].append(species)
-
-        for (ootw, db, sim), species_list in sorted(by_pair.items(), key=lambda x: -x[0][2]):
+        for (ootw, db, sim), species_list in pair_groups:
             # Get DB hybrid's actual parents
             db_hybrid_name = f"× {db}"
             db_hybrid = all_species.get(db_hybrid_name)
@@ -219,7 +341,7 @@ def main():
             else:
                 db_parents = "hybrid not found in DB"
 
-            ootw_parents = ', '.join(sorted(set(species_list)))
+            ootw_parents = ', '.join(species_list)
 
             report_lines.append(f"  OOTW: '{ootw}' (parents: {ootw_parents})")
             report_lines.append(f"  DB:   '{db_hybrid_name}' (parents: {db_parents})")
@@ -238,21 +360,16 @@ def main():
         report_lines.append("Format: 'hybrid_name' (OOTW parents: species that list this hybrid)")
         report_lines.append("")
 
-        # Group by hybrid name
-        by_name = defaultdict(list)
-        for species, name in no_matches:
-            by_name[name].append(species)
-
-        for name, species_list in sorted(by_name.items()):
-            ootw_parents = ', '.join(sorted(set(species_list)))
+        for name, species_list in name_groups:
+            ootw_parents = ', '.join(species_list)
             report_lines.append(f"  '{name}' (OOTW parents: {ootw_parents})")
         report_lines.append("")
 
-    report = "\n".join(report_lines)
-
-    # Write report
-    with open(REPORT_OUTPUT, 'w') as f:
-        f.write(report)
+    # Write report; writelines streams the lines through a large buffer
+    # without materializing the joined report string
+    with open(REPORT_OUTPUT, 'w', buffering=1 << 20, encoding='utf-8') as f:
+        f.writelines(line + '\n' for line in report_lines[:-1])
+        f.write(report_lines[-1])
 
     # Read existing mapping file to preserve good_matches
     existing_good_matches = {}
@@ -266,11 +383,7 @@ def main():
 
     # Build detailed close_matches with parent info
     close_matches_detailed = {}
-    by_pair = defaultdict(list)
-    for species, ootw, db, sim in close_matches:
-        by_pair[(ootw, db, sim)].append(species)
-
-    for (ootw, db, sim), species_list in by_pair.items():
+    for (ootw, db, sim), species_list in pair_groups:
         # Get DB hybrid's actual parents
         db_hybrid_name = f"× {db}"
         db_hybrid = all_species.get(db_hybrid_name)
@@ -284,20 +397,13 @@ def main():
         close_matches_detailed[ootw] = {
             "db_name": db,
             "similarity": round(sim, 2),
-            "ootw_parents": sorted(set(species_list)),
+            "ootw_parents": species_list,
             "db_parents": [db_p1, db_p2]
         }
 
     # Build detailed no_matches with parent info
-    no_matches_detailed = {}
-    by_name = defaultdict(list)
-    for species, name in no_matches:
-        by_name[name].append(species)
-
-    for name, species_list in by_name.items():
-        no_matches_detailed[name] = {
-            "ootw_parents": sorted(set(species_list))
-        }
+    no_matches_detailed = {name: {"ootw_parents": species_list}
+                           for name, species_list in name_groups}
 
     # Write mapping file
     mapping_data = {
@@ -306,10 +412,10 @@ def main():
         "close_matches": close_matches_detailed,
         "no_matches": no_matches_detailed
     }
-    with open(MAPPING_OUTPUT, 'w') as f:
+    with open(MAPPING_OUTPUT, 'w', buffering=1 << 20, encoding='utf-8') as f:
         json.dump(mapping_data, f, indent=2)
 
-    print(report)
+    sys.stdout.writelines(line + '\n' for line in report_lines)
     print(f"\nReport written to: {REPORT_OUTPUT}")
     print(f"Mapping written to: {MAPPING_OUTPUT}")
 
@@ -13,8 +13,9 @@ Usage:
 
 import csv
 import sys
+from functools import lru_cache
 from pathlib import Path
-from collections import defaultdict
+from collections import defaultdict, deque
 
 
 def parse_inat_csv(csv_path):
@@ -23,13 +24,24 @@ def parse_inat_csv(csv_path):
     species_entries = []
 
     with open(csv_path, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
+        # Resolve column indices from the header once and index rows
+        # directly; DictReader would allocate and hash a fresh dict for
+        # every row of a multi-MB export
+        reader = csv.reader(f)
+        col = {name: i for i, name in enumerate(next(reader))}
+        id_i = col['id']
+        rank_i = col['taxonRank']
+        name_i = col['scientificName']
+        parent_i = col['parentNameUsageID']
+        url_i = col['taxonID']
+        epithet_i = col.get('specificEpithet')
+        infra_i = col.get('infraspecificEpithet')
+
         for row in reader:
-            taxon_id = row['id']
-            rank = row['taxonRank']
-            name = row['scientificName']
-            parent_url = row['parentNameUsageID']
-            taxon_url = row['taxonID']
+            taxon_id = row[id_i]
+            rank = row[rank_i]
+            name = row[name_i]
+            parent_url = row[parent_i]
 
             # Extract parent ID from URL
             parent_id = None
@@ -41,58 +53,62 @@ def parse_inat_csv(csv_path):
                 'name': name,
                 'rank': rank,
                 'parent_id': parent_id,
-                'url': taxon_url,
-                'specific_epithet': row.get('specificEpithet', ''),
-                'infraspecific_epithet': row.get('infraspecificEpithet', ''),
+                'url': row[url_i],
+                'specific_epithet': row[epithet_i] if epithet_i is not None else '',
+                'infraspecific_epithet': row[infra_i] if infra_i is not None else '',
             }
 
             # Collect species-level entries
             if rank in ('species', 'hybrid', 'subspecies', 'variety', 'infrahybrid'):
                 species_entries.append(taxa_by_id[taxon_id])
 
+    resolve_taxonomy(taxa_by_id)
+
     return taxa_by_id, species_entries
 
 
-def get_taxonomy_chain(taxon, taxa_by_id):
-    """Walk up the taxonomy tree to find subgenus, section, subsection, complex."""
-    taxonomy = {
-        'subgenus': None,
-        'section': None,
-        'subsection': None,
-        'complex': None,
-    }
-
-    current = taxon
-    visited = set()
-
-    while current and current['id'] not in visited:
-        visited.add(current['id'])
-        rank = current['rank']
-
-        if rank == 'subgenus':
-            # Extract name from "Quercus subg. Cerris" -> "Cerris"
-            name = extract_taxon_name(current['name'], rank)
-            taxonomy['subgenus'] = name
-        elif rank == 'section':
-            name = extract_taxon_name(current['name'], rank)
-            taxonomy['section'] = name
-        elif rank == 'subsection':
-            name = extract_taxon_name(current['name'], rank)
-            taxonomy['subsection'] = name
-        elif rank == 'complex':
-            name = extract_taxon_name(current['name'], rank)
-            taxonomy['complex'] = name
-
-        # Move to parent
-        parent_id = current.get('parent_id')
+_TAXONOMY_RANKS = ('subgenus', 'section', 'subsection', 'complex')
+_EMPTY_TAXONOMY = dict.fromkeys(_TAXONOMY_RANKS)
+
+
+def resolve_taxonomy(taxa_by_id):
+    """Resolve every taxon's (subgenus, section, subsection, complex).
+
+    One breadth-first pass from the roots, with each node inheriting
+    its parent's resolved taxonomy, instead of an upward tree walk per
+    species — O(nodes) total rather than O(species x depth). Stores the
+    result on each taxon as '_taxonomy'; the dicts are shared along
+    chains and must be treated as read-only.
+    """
+    children = defaultdict(list)
+    queue = deque()
+    for taxon in taxa_by_id.values():
+        parent_id = taxon.get('parent_id')
         if parent_id and parent_id in taxa_by_id:
-            current = taxa_by_id[parent_id]
+            children[parent_id].append(taxon)
         else:
-            break
+            taxon['_taxonomy'] = _inherit(taxon, _EMPTY_TAXONOMY)
+            queue.append(taxon)
+
+    while queue:
+        taxon = queue.popleft()
+        for child in children[taxon['id']]:
+            child['_taxonomy'] = _inherit(child, taxon['_taxonomy'])
+            queue.append(child)
 
-    return taxonomy
 
+def _inherit(taxon, parent_taxonomy):
+    """Derive a taxon's taxonomy dict from its parent's."""
+    rank = taxon['rank']
+    if rank in _TAXONOMY_RANKS:
+        # Extract name from e.g. "Quercus subg. Cerris" -> "Cerris"
+        taxonomy = dict(parent_taxonomy)
+        taxonomy[rank] = extract_taxon_name(taxon['name'], rank)
+        return taxonomy
+    return parent_taxonomy
 
+
+@lru_cache(maxsize=None)
 def extract_taxon_name(full_name, rank):
     """Extract just the taxon name from the full scientific name."""
     parts = full_name.split()
@@ -151,47 +167,64 @@ def is_hybrid(name, rank):
     return rank in ('hybrid', 'infrahybrid') or '×' in name
 
 
+# One emit template per combination of populated taxonomy fields,
+# selected by bitmask so the per-species loop is a single format call
+# instead of four branches and several small writes
+_TEMPLATE_FIELDS = (
+    "  subgenus: {subgenus}\n",
+    "  section: {section}\n",
+    "  subsection: {subsection}\n",
+    "  complex: \"{complex}\"\n",
+)
+
+TEMPLATES = {}
+for _mask in range(1 << len(_TEMPLATE_FIELDS)):
+    _body = "\n- scientific_name: \"{name}\"\n  is_hybrid: {hybrid}\n"
+    for _bit, _fragment in enumerate(_TEMPLATE_FIELDS):
+        if _mask & (1 << _bit):
+            _body += _fragment
+    TEMPLATES[_mask] = _body
+
+
 def generate_yaml(taxa_by_id, species_entries, output_path):
-    """Generate YAML output file for oak import-bulk."""
-
-    lines = [
-        "# Quercus Species from iNaturalist",
-        "# Generated from iNaturalist taxonomy export",
-        "#",
-        "# Import with: oak import-bulk data/species-inat.yaml --source-id inat",
-        "",
-    ]
-
-    for entry in sorted(species_entries, key=lambda x: x['name']):
-        name = entry['name']
-        rank = entry['rank']
-
-        # Get species name (without Quercus prefix)
-        species_name = extract_species_name(name, rank)
-
-        # Get taxonomy chain
-        taxonomy = get_taxonomy_chain(entry, taxa_by_id)
-
-        # Determine if hybrid
-        hybrid = is_hybrid(name, rank)
-
-        lines.append(f"- scientific_name: \"{species_name}\"")
-        lines.append(f"  is_hybrid: {str(hybrid).lower()}")
-
-        # Add taxonomy if available
-        if taxonomy['subgenus']:
-            lines.append(f"  subgenus: {taxonomy['subgenus']}")
-        if taxonomy['section']:
-            lines.append(f"  section: {taxonomy['section']}")
-        if taxonomy['subsection']:
-            lines.append(f"  subsection: {taxonomy['subsection']}")
-        if taxonomy['complex']:
-            lines.append(f"  complex: \"{taxonomy['complex']}\"")
-
-        lines.append("")
-
-    with open(output_path, 'w', encoding='utf-8') as f:
-        f.write('\n'.join(lines))
+    """Generate YAML output file for oak import-bulk.
+
+    Streams each entry straight to a large-buffered file instead of
+    accumulating every line in a list and joining it at the end, which
+    would briefly hold the whole document in memory twice.
+    """
+    with open(output_path, 'w', buffering=1 << 20, encoding='utf-8') as out:
+        out.write(
+            "# Quercus Species from iNaturalist\n"
+            "# Generated from iNaturalist taxonomy export\n"
+            "#\n"
+            "# Import with: oak import-bulk data/species-inat.yaml --source-id inat\n"
+        )
+
+        for entry in sorted(species_entries, key=lambda x: x['name']):
+            name = entry['name']
+            rank = entry['rank']
+
+            # Get species name (without Quercus prefix)
+            species_name = extract_species_name(name, rank)
+
+            # Taxonomy chain resolved up front by resolve_taxonomy
+            # (nodes inside a parent cycle never get one)
+            taxonomy = entry.get('_taxonomy', _EMPTY_TAXONOMY)
+
+            # Determine if hybrid
+            hybrid = is_hybrid(name, rank)
+
+            # Emit via the template matching the populated taxonomy
+            # fields (empty slots never reach a format placeholder)
+            mask = ((1 if taxonomy['subgenus'] else 0)
+                    | (2 if taxonomy['section'] else 0)
+                    | (4 if taxonomy['subsection'] else 0)
+                    | (8 if taxonomy['complex'] else 0))
+            out.write(TEMPLATES[mask].format(
+                name=species_name,
+                hybrid='true' if hybrid else 'false',
+                **taxonomy))
 
     return len(species_entries)
 
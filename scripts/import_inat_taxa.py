@@ -13,6 +13,7 @@ Usage:
 
 import csv
 import sys
+from operator import itemgetter
 from pathlib import Path
 from collections import defaultdict
 
@@ -23,13 +24,23 @@ def parse_inat_csv(csv_path):
     taxa_by_rank = defaultdict(list)
 
     with open(csv_path, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
+        # Resolve column indices from the header once and index rows
+        # directly; DictReader would allocate and hash a fresh dict for
+        # every row of a multi-MB export
+        reader = csv.reader(f)
+        col = {name: i for i, name in enumerate(next(reader))}
+        id_i = col['id']
+        rank_i = col['taxonRank']
+        name_i = col['scientificName']
+        parent_i = col['parentNameUsageID']
+        url_i = col['taxonID']
+        epithet_i = col.get('specificEpithet')
+        infra_i = col.get('infraspecificEpithet')
+
         for row in reader:
-            taxon_id = row['id']
-            rank = row['taxonRank']
-            name = row['scientificName']
-            parent_url = row['parentNameUsageID']
-            taxon_url = row['taxonID']
+            taxon_id = row[id_i]
+            rank = row[rank_i]
+            parent_url = row[parent_i]
 
             # Extract parent ID from URL
             parent_id = None
@@ -38,15 +49,23 @@ def parse_inat_csv(csv_path):
 
             taxa_by_id[taxon_id] = {
                 'id': taxon_id,
-                'name': name,
+                'name': row[name_i],
                 'rank': rank,
                 'parent_id': parent_id,
-                'url': taxon_url,
-                'specific_epithet': row.get('specificEpithet', ''),
-                'infraspecific_epithet': row.get('infraspecificEpithet', ''),
+                'url': row[url_i],
+                'specific_epithet': row[epithet_i] if epithet_i is not None else '',
+                'infraspecific_epithet': row[infra_i] if infra_i is not None else '',
             }
             taxa_by_rank[rank].append(taxa_by_id[taxon_id])
 
+    # Sort each rank once and resolve parent names up front, so the
+    # YAML emit loop is a flat formatting pass with no repeated sorts
+    # or per-row parent walks
+    for items in taxa_by_rank.values():
+        items.sort(key=itemgetter('name'))
+        for taxon in items:
+            taxon['parent_name'] = get_parent_name(taxon, taxa_by_id)
+
     return taxa_by_id, taxa_by_rank
 
 
@@ -133,79 +152,56 @@ def extract_taxon_name(full_name, rank):
     return parts[-1] if parts else full_name
 
 
+def _write_rank(out, taxa_by_rank, rank, quote_name=False):
+    """Stream one rank's taxa to the output file (pre-sorted by name)."""
+    for i, taxon in enumerate(taxa_by_rank.get(rank, [])):
+        if i:
+            out.write("\n")
+        name = extract_taxon_name(taxon['name'], rank)
+        if quote_name:
+            out.write(f"  - name: \"{name}\"\n")
+        else:
+            out.write(f"  - name: {name}\n")
+        if rank != 'subgenus':
+            parent = taxon['parent_name']
+            if parent:
+                out.write(f"    parent: {parent}\n")
+        out.write("    author: null\n"
+                  "    notes: null\n"
+                  "    links:\n"
+                  "      - label: iNaturalist\n"
+                  f"        url: {taxon['url']}\n")
+
+
 def generate_yaml(taxa_by_id, taxa_by_rank, output_path):
-    """Generate YAML output file."""
-
-    lines = [
-        "# Quercus Taxonomy from iNaturalist",
-        "# Generated from iNaturalist taxonomy export",
-        "#",
-        "# Links format:",
-        "#   links:",
-        "#     - label: iNaturalist",
-        "#       url: https://www.inaturalist.org/taxa/...",
-        "",
-        "subgenera:"
-    ]
-
-    # Process subgenera
-    for taxon in sorted(taxa_by_rank.get('subgenus', []), key=lambda x: x['name']):
-        name = extract_taxon_name(taxon['name'], 'subgenus')
-        lines.append(f"  - name: {name}")
-        lines.append(f"    author: null")
-        lines.append(f"    notes: null")
-        lines.append(f"    links:")
-        lines.append(f"      - label: iNaturalist")
-        lines.append(f"        url: {taxon['url']}")
-        lines.append("")
-
-    # Process sections
-    lines.append("sections:")
-    for taxon in sorted(taxa_by_rank.get('section', []), key=lambda x: x['name']):
-        name = extract_taxon_name(taxon['name'], 'section')
-        parent = get_parent_name(taxon, taxa_by_id)
-        lines.append(f"  - name: {name}")
-        if parent:
-            lines.append(f"    parent: {parent}")
-        lines.append(f"    author: null")
-        lines.append(f"    notes: null")
-        lines.append(f"    links:")
-        lines.append(f"      - label: iNaturalist")
-        lines.append(f"        url: {taxon['url']}")
-        lines.append("")
-
-    # Process subsections
-    lines.append("subsections:")
-    for taxon in sorted(taxa_by_rank.get('subsection', []), key=lambda x: x['name']):
-        name = extract_taxon_name(taxon['name'], 'subsection')
-        parent = get_parent_name(taxon, taxa_by_id)
-        lines.append(f"  - name: {name}")
-        if parent:
-            lines.append(f"    parent: {parent}")
-        lines.append(f"    author: null")
-        lines.append(f"    notes: null")
-        lines.append(f"    links:")
-        lines.append(f"      - label: iNaturalist")
-        lines.append(f"        url: {taxon['url']}")
-        lines.append("")
-
-    # Process complexes
-    lines.append("complexes:")
-    for taxon in sorted(taxa_by_rank.get('complex', []), key=lambda x: x['name']):
-        name = extract_taxon_name(taxon['name'], 'complex')
-        parent = get_parent_name(taxon, taxa_by_id)
-        lines.append(f"  - name: \"{name}\"")
-        if parent:
-            lines.append(f"    parent: {parent}")
-        lines.append(f"    author: null")
-        lines.append(f"    notes: null")
-        lines.append(f"    links:")
-        lines.append(f"      - label: iNaturalist")
-        lines.append(f"        url: {taxon['url']}")
-        lines.append("")
-
-    with open(output_path, 'w', encoding='utf-8') as f:
-        f.write('\n'.join(lines))
+    """Generate YAML output file.
+
+    Streams each taxon straight to a large-buffered file instead of
+    accumulating every line in a list and joining it at the end, which
+    would briefly hold the whole document in memory twice.
+    """
+    with open(output_path, 'w', buffering=1 << 20, encoding='utf-8') as out:
+        out.write(
+            "# Quercus Taxonomy from iNaturalist\n"
+            "# Generated from iNaturalist taxonomy export\n"
+            "#\n"
+            "# Links format:\n"
+            "#   links:\n"
+            "#     - label: iNaturalist\n"
+            "#       url: https://www.inaturalist.org/taxa/...\n"
+            "\n"
+            "subgenera:\n"
+        )
+        _write_rank(out, taxa_by_rank, 'subgenus')
+
+        out.write("\nsections:\n")
+        _write_rank(out, taxa_by_rank, 'section')
+
+        out.write("\nsubsections:\n")
+        _write_rank(out, taxa_by_rank, 'subsection')
+
+        out.write("\ncomplexes:\n")
+        _write_rank(out, taxa_by_rank, 'complex', quote_name=True)
 
     return taxa_by_rank
 